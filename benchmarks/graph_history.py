@@ -0,0 +1,65 @@
+""" Measures the latency of rendering a graph as the length of its history
+grows, with and without downsampling the data line to the width of the
+graph (`GraphGenerator.add_data(downsample=True)`).
+
+Run from the root of the repository:
+    python benchmarks/graph_history.py [repeats]
+"""
+
+# Built in modules
+import os
+import sys
+import time
+
+# NumPy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# My code
+from grapher import GraphGenerator, PillowGraphGenerator  # noqa: E402
+
+SIZE = (972, 324)  # The size of a graph in a 1080x1080 poster
+HISTORY_LENGTHS = (60, 1000, 5000, 20000)  # days
+
+
+def build_graph(cls, data, downsample: bool) -> GraphGenerator:
+    graph = cls()
+    graph.add_data(data, color=(248, 170, 18), downsample=downsample)
+    graph.add_guide_line(y=1000, color="black")
+    return graph
+
+
+def measure(cls, data, downsample: bool, repeats: int) -> float:
+    """ Returns the median latency of rendering the graph, in milliseconds. """
+
+    build_graph(cls, data, downsample).to_img(size=SIZE)  # Warm up
+
+    latencies = list()
+    for _ in range(repeats):
+        graph = build_graph(cls, data, downsample)
+        start = time.perf_counter()
+        graph.to_img(size=SIZE)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return latencies[len(latencies) // 2]
+
+
+def main(repeats: int = 10):
+    random = np.random.default_rng(0)
+
+    for cls in (GraphGenerator, PillowGraphGenerator):
+        print(cls.__name__)
+
+        for days in HISTORY_LENGTHS:
+            data = (1000 + np.cumsum(random.normal(size=days)) * 10).tolist()
+            full = measure(cls, data, False, repeats)
+            downsampled = measure(cls, data, True, repeats)
+
+            print(f"  {days:6} days: {full:7.1f}ms full, "
+                  f"{downsampled:7.1f}ms downsampled")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
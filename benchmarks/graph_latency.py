@@ -0,0 +1,79 @@
+""" Compares the latency of rasterizing a graph into a Pillow image by
+saving it as a PNG file in memory and opening it again, by copying it
+straight from the Agg canvas (`GraphGenerator.to_img`), and by drawing it
+with Pillow (`PillowGraphGenerator.to_img`).
+
+Run from the root of the repository:
+    python benchmarks/graph_latency.py [repeats]
+"""
+
+# Built in modules
+import io
+import math
+import os
+import sys
+import time
+
+# Pillow
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# My code
+from grapher import GraphGenerator, PillowGraphGenerator  # noqa: E402
+
+SIZE = (972, 324)  # The size of a graph in a 1080x1080 poster
+
+
+def build_graph(cls=GraphGenerator) -> GraphGenerator:
+    graph = cls()
+    graph.set_title("New cases a day in the last 30 days", "black")
+    graph.add_data([1000 + 800 * math.sin(day / 5) for day in range(30)],
+                   color=(248, 170, 18))
+    graph.add_guide_line(y=1000, color="black")
+    return graph
+
+
+def png_round_trip(graph: GraphGenerator) -> Image.Image:
+    buffer = io.BytesIO()
+    graph.save(buffer, size=SIZE)
+    buffer.seek(0)
+
+    img = Image.open(buffer)
+    img.load()
+    return img
+
+
+def to_img(graph: GraphGenerator) -> Image.Image:
+    return graph.to_img(size=SIZE)
+
+
+def measure(render, repeats: int, cls=GraphGenerator) -> float:
+    """ Returns the median latency of the given render function, in
+    milliseconds. """
+
+    render(build_graph(cls))  # Warm up (fonts, caches)
+
+    latencies = list()
+    for _ in range(repeats):
+        graph = build_graph(cls)
+        start = time.perf_counter()
+        render(graph)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return latencies[len(latencies) // 2]
+
+
+def main(repeats: int = 30):
+    before = measure(png_round_trip, repeats)
+    after = measure(to_img, repeats)
+    pillow = measure(to_img, repeats, cls=PillowGraphGenerator)
+
+    print(f"PNG round trip: {before:7.1f}ms per graph")
+    print(f"Agg buffer:     {after:7.1f}ms per graph ({before / after:.2f}x)")
+    print(f"Pillow backend: {pillow:7.1f}ms per graph ({before / pillow:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,71 @@
+""" Measures the time it takes to import the modules of the bot, with
+`python -X importtime` in a fresh interpreter, and lists the slowest
+imports of each module - so heavy dependencies that are imported eagerly
+are easy to spot.
+
+Run from the root of the repository:
+    python benchmarks/import_time.py [repeats]
+"""
+
+# Built in modules
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("main", "layout", "painter", "grapher", "translator", "hopkins_api")
+SLOWEST_COUNT = 5
+
+
+def import_times(module: str) -> Tuple[int, List[Tuple[str, int]]]:
+    """ Imports the given module in a new interpreter, and returns its
+    cumulative import time and the cumulative import time of each module it
+    imports directly (as (name, time) tuples), in microseconds. """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    # Each line is "import time: self | cumulative | name", where the name
+    # is indented by 2 spaces for each level of nesting. Modules are listed
+    # after the modules they import.
+    imports = list()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # The header
+
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+
+        if depth == 0:
+            if name == module:
+                return int(cumulative), imports
+            imports = list()
+
+        elif depth == 1:
+            imports.append((name, int(cumulative)))
+
+    raise RuntimeError(f"Module {module} was not imported")
+
+
+def main(repeats: int = 5):
+    for module in MODULES:
+        runs = sorted([import_times(module) for _ in range(repeats)])
+        total, imports = runs[len(runs) // 2]
+
+        print(f"{module}: {total / 1000:7.1f}ms")
+
+        imports.sort(key=lambda item: item[1], reverse=True)
+        for name, micros in imports[:SLOWEST_COUNT]:
+            print(f"    {name:28} {micros / 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
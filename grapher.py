@@ -1,17 +1,162 @@
+import math
+import os
+import hashlib
+import tempfile
+import threading
+import importlib.metadata
+import logging
+from collections import OrderedDict
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from matplotlib.patches import Polygon
+import PIL
 from bidi.algorithm import get_display
-from PIL import Image
-import os
+from PIL import Image, ImageColor, ImageDraw, ImageFont, UnidentifiedImageError
 
-from typing import Tuple, List, Union, Optional
+from typing import Tuple, List, Union, Optional, BinaryIO, Iterator
 
 from translator import StringManager, StringManagerDependent
 
+logger = logging.getLogger(__name__)
+
+
+class GraphRenderCache:
+    """
+    A cache of rendered graphs, keyed by the fingerprint of the graph (see
+    `GraphGenerator.fingerprint`). The images are kept in memory, and the
+    least recently used ones are dropped when there are more than
+    `max_items` of them. If a `path` to a folder is given, the images are
+    also saved there as PNG files, so they are shared between processes and
+    runs of the bot. The folder is never pruned: the files are named by
+    the fingerprints of the graphs, so it keeps growing as the data changes
+    - remove old files from it (for example, by their age) if needed. A
+    corrupted file is treated as a miss, and removed.
+
+    Safe to use from multiple threads. Set as the cache of all of the graphs
+    with `GraphGenerator.set_render_cache`.
+    """
+
+    def __init__(self, max_items: int = 32, path: Optional[str] = None):
+        assert max_items > 0, "The cache must hold at least one graph"
+
+        self.__max_items = max_items
+        self.__path = path
+        self.__images = OrderedDict()
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @property
+    def path(self,) -> Optional[str]:
+        return self.__path
+
+    @property
+    def hits(self,) -> int:
+        return self.__hits
+
+    @property
+    def misses(self,) -> int:
+        return self.__misses
+
+    def __len__(self,) -> int:
+        return len(self.__images)
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        """ Returns the image saved under the given key (`None` if there is no
+        such image). The returned image is shared, and should not be
+        modified! """
+
+        with self.__lock:
+            img = self.__images.get(key)
+            if img is not None:
+                self.__images.move_to_end(key)
+                self.__hits += 1
+                return img
+
+        img = self.__load(key)
+
+        with self.__lock:
+            if img is None:
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            self.__remember(key, img)
+
+        return img
+
+    def put(self, key: str, img: Image.Image) -> None:
+        """ Saves the given image under the given key. The image is shared,
+        and should not be modified after it is saved! """
+
+        with self.__lock:
+            self.__remember(key, img)
+
+        if self.path is not None:
+            self.__store(key, img)
+
+    def clear(self,) -> None:
+        """ Removes the images from the memory (not from the disk). """
+
+        with self.__lock:
+            self.__images.clear()
+
+    def __remember(self, key: str, img: Image.Image) -> None:
+        self.__images[key] = img
+        self.__images.move_to_end(key)
+
+        while len(self.__images) > self.__max_items:
+            self.__images.popitem(last=False)
+
+    def __file_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.png")
+
+    def __load(self, key: str) -> Optional[Image.Image]:
+        if self.path is None:
+            return None
+
+        path = self.__file_path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                return img
+        except FileNotFoundError:
+            return None
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            # A half copied file, for example - rendered (and saved) again
+            logger.warning("The cached graph %s is corrupted - removed", path)
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def __store(self, key: str, img: Image.Image) -> None:
+        # Written into a temporary file first, so other processes never read
+        # a half written image
+        fd, temp_path = tempfile.mkstemp(suffix=".png", dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, format="PNG", compress_level=1)
+            os.replace(temp_path, self.__file_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
 
 class GraphGenerator(StringManagerDependent):
+    """
+    Generates the graphs of the poster. The figures are created with the
+    object oriented API of matplotlib (`Figure` and `FigureCanvasAgg`), and
+    not with `pyplot` - so there is no global state, the figures are freed
+    like any other object, and graphs can be rendered in multiple threads.
+
+    Matplotlib is slow to import, so it is imported only when the first
+    figure is built - importing this module doesn't import it.
+    """
 
     GENERAL_LINES_CONFIG = {
         "linewidth": 5,
@@ -49,15 +194,48 @@ class GraphGenerator(StringManagerDependent):
 
     MARK_TEXT_OFFEST = 0.125  # relative to the height of the figure
 
+    DPI = 100  # Pixels per inch, when the graph is not scaled
+
+    GRADIENT_STEPS = 100  # The resolution of the gradient texture
+
+    # Part of the fingerprint of the rendered graphs - must be changed
+    # whenever the drawing of the graphs changes, so old cached graphs
+    # (see `GraphRenderCache`) are not used anymore
+    RENDER_VERSION = 1
+
+    # The cache of the rendered graphs (`None` = no cache), and the versions
+    # of the backends, keyed by the class of the graph generator.
+    # See the `set_render_cache` method for more information!
+    __render_cache = None
+    __backend_versions = dict()
+
+    # Gradient textures, keyed by the (RGB) color and the alpha.
+    # See the `_get_gradient_texture` method for more information!
+    __gradient_textures = dict()
+
     def __init__(self,
                  string_manager: StringManager = None,
+                 baked_gradient: bool = False,
                  ):
+        """ If `baked_gradient` is set, the gradient below each line is baked
+        into a single image in the size it is drawn in, with the area above
+        the line already transparent - instead of drawing a gradient texture
+        clipped by the shape of the line, which is much slower in Agg. """
+
         super().__init__(string_manager)
 
         self._data = list()
         self._guides = list()
         self._title = (None, None)
 
+        self.__baked_gradient = baked_gradient
+        self.__gradients_to_bake = list()
+
+        # The graphs plotted into the last generated figure, as (axes, graph,
+        # width, data artists, guide artists) tuples.
+        # See the `animate` method for more information!
+        self.__plotted_graphs = list()
+
     def add_data(self,
                  data: List[float],
                  color="black",
@@ -65,7 +243,13 @@ class GraphGenerator(StringManagerDependent):
                  max_color=None,
                  min_text="{y}",
                  max_text="{y}",
+                 downsample: bool = False,
                  ) -> None:
+        """ Adds a data line to the graph. If `downsample` is set, long lines
+        are drawn with only the points that can be seen in the width of the
+        graph (see the `_downsample` method) - the marked points are always
+        the real first, last, minimum and maximum points of the data. """
+
         self._data.append({
             "data": data,
             "color": color,
@@ -73,6 +257,7 @@ class GraphGenerator(StringManagerDependent):
             "max_color": max_color,
             "min_text": min_text,
             "max_text": max_text,
+            "downsample": downsample,
         })
 
     def add_guide_line(self,
@@ -92,11 +277,14 @@ class GraphGenerator(StringManagerDependent):
                    max_color,
                    min_text,
                    max_text,
+                   downsample=False,
+                   width: Optional[int] = None,
                    ) -> None:
-        """ Plots the given data list to the figure. """
+        """ Plots the given data list to the figure. `width` is the width of
+        the graph in pixels, used for downsampling. """
 
-        x_list = [i for i in range(len(data))]
-        self.__plot_line_with_gradient(ax=ax, x=x_list, y=data, color=color)
+        x_list, y_list = self._line_points(data, downsample, width)
+        self.__plot_line_with_gradient(ax=ax, x=x_list, y=y_list, color=color)
 
         min_y = min(data)
         max_y = max(data)
@@ -137,33 +325,209 @@ class GraphGenerator(StringManagerDependent):
 
         ax.plot(x, y, **config)
 
-    def _plot_title(self, ax,):
-        title, color = self._title
+    def _plot_title(self, ax, title: Optional[str], color=None):
         if title is not None:
             ax.set_title(get_display(title),
                          **self.TITLE_TEXT_CONFIG,
                          color=color)
 
-    def _generate(self):
-        """ Generates the figure and returns a matplotlib `figure` instance. """
+    def _plot_graph(self,
+                    ax,
+                    graph: 'GraphGenerator',
+                    width: Optional[int] = None,
+                    ) -> None:
+        """ Plots the data lines, the guide lines and the title of the given
+        graph (usually `self`) to the given axes. `width` is the width of
+        the axes in pixels (if known), used for downsampling long data
+        lines. """
 
-        fig, ax = self.__build_empty_fig()
-        data_len = 0
+        data_len = max([len(data["data"]) for data in graph._data], default=0)
 
-        for data in self._data:
-            data_len = max([data_len, len(data["data"])])
-            self._plot_data(ax, **data)
+        data_artists = self.__added_artists(ax, lambda: [
+            self._plot_data(ax, width=width, **data)
+            for data in graph._data
+        ])
 
-        for guide in self._guides:
+        guide_artists = self.__added_artists(ax, lambda: [
             self._plot_guide_line(ax, length=data_len, **guide)
+            for guide in graph._guides
+        ])
+
+        self._plot_title(ax, *graph._title)
+
+        self.__plotted_graphs.append(
+            (ax, graph, width, data_artists, guide_artists))
+
+    @staticmethod
+    def __added_artists(ax, plot) -> list:
+        """ Calls the given plotting function, and returns the artists it
+        added to the given axes. """
+
+        before = set(ax.get_children())
+        plot()
+        return [artist for artist in ax.get_children() if artist not in before]
 
-        self._plot_title(ax)
+    def _generate(self, width: Optional[int] = None):
+        """ Generates the figure and returns a matplotlib `figure` instance,
+        attached to an Agg canvas, and its axes. `width` is the width of the
+        graph in pixels (if known), used for downsampling long data lines. """
+
+        fig, (ax,) = self._build_empty_fig()
+        self._plot_graph(ax, self, width=width)
 
         return fig, ax
 
-    def to_img(self, temp_file_path: str = "fig.png", size=None,) -> Image.Image:
-        self.save(temp_file_path, size=size,)
-        return Image.open(temp_file_path)
+    @classmethod
+    def set_render_cache(cls, cache: Optional[GraphRenderCache]) -> None:
+        """ Sets the cache of the rendered graphs of all of the graph
+        generators (`None` = don't cache). See the `to_img` method. """
+        GraphGenerator.__render_cache = cache
+
+    @classmethod
+    def get_render_cache(cls,) -> Optional[GraphRenderCache]:
+        return GraphGenerator.__render_cache
+
+    @classmethod
+    def _backend_version(cls,) -> str:
+        """ The version of the library that draws the graphs. """
+        return importlib.metadata.version("matplotlib")
+
+    @classmethod
+    def __get_backend_version(cls,) -> str:
+        if cls not in GraphGenerator.__backend_versions:
+            GraphGenerator.__backend_versions[cls] = cls._backend_version()
+        return GraphGenerator.__backend_versions[cls]
+
+    def fingerprint(self, size=None, scale: float = 1) -> str:
+        """ Returns a hash of everything the image of the graph depends on:
+        the data lines and their colors, the guide lines, the title, the size
+        and the scale of the image, and the backend that draws it. Graphs
+        with the same fingerprint have the same image. """
+
+        meta = (
+            type(self).__name__,
+            self.RENDER_VERSION,
+            self.__get_backend_version(),
+            self.__baked_gradient,
+            [{**data, "data": len(data["data"])} for data in self._data],
+            self._guides,
+            self._title,
+            None if size is None else tuple(size),
+            scale,
+            self._string_manager.fingerprint,
+        )
+
+        hasher = hashlib.sha256(repr(meta).encode())
+        for data in self._data:
+            hasher.update(np.asarray(data["data"], dtype=float).tobytes())
+
+        return hasher.hexdigest()
+
+    def to_img(self, size=None, scale: float = 1,) -> Image.Image:
+        """ Returns the graph as a (transparent) Pillow image. If a render
+        cache is set (see `set_render_cache`) and an identical graph was
+        already rendered, its image is copied from the cache instead. """
+
+        cache = self.get_render_cache()
+        if cache is None:
+            return self._render(size=size, scale=scale)
+
+        key = self.fingerprint(size=size, scale=scale)
+        img = cache.get(key)
+        if img is None:
+            img = self._render(size=size, scale=scale)
+            cache.put(key, img)
+
+        return img.copy()
+
+    def _render(self, size=None, scale: float = 1,) -> Image.Image:
+        """ Renders the figure into a Pillow image. The figure is rasterized
+        by Agg and copied straight from its pixel buffer, without encoding it
+        into a file. Transparent like the images that `save` generates. """
+
+        fig = self.__prepare_fig(size=size, scale=scale)
+        self.__make_transparent(fig)
+
+        fig.canvas.draw()
+        return self.__canvas_image(fig.canvas)
+
+    def animate(self,
+                size=None,
+                scale: float = 1,
+                start: int = 2,
+                ) -> Iterator[Image.Image]:
+        """ Yields the frames of an animation of the graph growing over time:
+        the first frame shows the first `start` points of each data line,
+        and each frame adds a point, up to the whole graph. All of the frames
+        share the limits and the layout of the whole graph.
+
+        The figure is built and laid out only once. The parts that don't
+        change (like the title) are drawn once and restored for each frame,
+        and only the data lines (and the guide lines above them) are plotted
+        and drawn again (blitting). Always drawn with matplotlib. """
+
+        fig = self.__prepare_fig(size=size, scale=scale)
+        self.__make_transparent(fig)
+
+        # The limits of the whole graph are kept for all of the frames
+        for ax in fig.axes:
+            ax.set_xlim(ax.get_xlim())
+            ax.set_ylim(ax.get_ylim())
+
+        # The guide lines are drawn above the data lines, so they are drawn
+        # again in each frame
+        plotted = list()
+        for ax, graph, width, data_artists, guide_artists in self.__plotted_graphs:
+            for artist in data_artists:
+                artist.remove()
+            for artist in guide_artists:
+                artist.set_visible(False)
+            plotted.append((ax, graph, width, guide_artists))
+
+        canvas = fig.canvas
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        length = max([len(data["data"]) for _, graph, _, _ in plotted
+                      for data in graph._data], default=0)
+
+        data_artists = [list() for _ in plotted]
+        for count in range(min(start, length), length + 1):
+            canvas.restore_region(background)
+
+            for index, (ax, graph, width, guide_artists) in enumerate(plotted):
+                for artist in data_artists[index]:
+                    artist.remove()
+
+                data_artists[index] = self.__added_artists(ax, lambda: [
+                    self._plot_data(ax, width=width,
+                                    **{**data, "data": data["data"][:count]})
+                    for data in graph._data
+                ])
+
+            self.__bake_gradients()
+
+            for (ax, _, _, guide_artists), artists in zip(plotted, data_artists):
+                for artist in sorted(artists + guide_artists, key=lambda cur: cur.get_zorder()):
+                    artist.set_visible(True)
+                    ax.draw_artist(artist)
+
+            yield self.__canvas_image(canvas)
+
+    @staticmethod
+    def __make_transparent(fig) -> None:
+        """ Removes the background of the figure and its axes, like
+        `savefig(transparent=True)` does. """
+
+        fig.patch.set_facecolor("none")
+        for ax in fig.axes:
+            ax.patch.set_facecolor("none")
+
+    @staticmethod
+    def __canvas_image(canvas) -> Image.Image:
+        """ Returns a copy of the pixels of the given (drawn) Agg canvas. """
+        return Image.frombuffer("RGBA", canvas.get_width_height(),
+                                canvas.buffer_rgba(), "raw", "RGBA", 0, 1).copy()
 
     def set_title(self, title: Optional[str] = None, color=None):
         self._title = (title, color)
@@ -171,17 +535,40 @@ class GraphGenerator(StringManagerDependent):
     def clear_title(self,):
         self.set_title(None)
 
-    def save(self, filepath: str, size=None):
-        """ Saves a clean version of the figure (without axes, transperant background). """
+    def save(self, filepath: Union[str, BinaryIO], size=None, scale: float = 1):
+        """ Saves a clean version of the figure (without axes, transperant background).
+        `scale` scales the texts, lines and markers of the graph, without
+        changing the size of the saved image. """
+
+        fig = self.__prepare_fig(size=size, scale=scale)
+        fig.savefig(filepath, transparent=True, dpi=fig.dpi)
+
+    def __prepare_fig(self, size=None, scale: float = 1):
+        """ Generates the figure and prepares it for rasterizing in the given
+        size (in pixels) and scale. """
 
-        fig, ax = self._generate()
+        from matplotlib import rcParams
 
+        dpi = self.DPI * scale
         if size is not None:
-            fig.set_size_inches(self.__pixels_to_inches(size))
+            width = size[0]
+        else:
+            width = round(rcParams["figure.figsize"][0] * dpi)
+
+        self.__plotted_graphs = list()
+        fig, _ = self._generate(width=width)
+
+        if size is not None:
+            fig.set_size_inches(self.__pixels_to_inches(size, dpi=dpi))
 
-        self.__config_ax(ax)
+        for ax in fig.axes:
+            self.__config_ax(ax)
         fig.tight_layout()
-        fig.savefig(filepath, transparent=True)
+        fig.set_dpi(dpi)
+
+        self.__bake_gradients()
+
+        return fig
 
     def __plot_line_with_gradient(self, ax, x, y, color):
         """
@@ -189,6 +576,9 @@ class GraphGenerator(StringManagerDependent):
         Edited from https://stackoverflow.com/a/29331211/10671845
         """
 
+        import matplotlib.colors as mcolors
+        from matplotlib.patches import Polygon
+
         config = {**self.MAIN_LINES_CONFIG,
                   "color": self.__normalize_color(color),
                   }
@@ -199,25 +589,132 @@ class GraphGenerator(StringManagerDependent):
         alpha = line.get_alpha()
         alpha = 1.0 if alpha is None else alpha
 
-        # Generate the gradient image
-        z = np.empty((100, 1, 4), dtype=float)
-        rgb = mcolors.colorConverter.to_rgb(color)
-        z[:, :, :3] = rgb
-        z[:, :, -1] = np.linspace(0, alpha, 100)[:, None]
-
         # Add the gradient image to the plot
-        im = ax.imshow(z, aspect='auto', extent=[min(x), max(x), min(y), max(y)],
+        texture = self._get_gradient_texture(
+            mcolors.colorConverter.to_rgb(color), alpha)
+        im = ax.imshow(texture, aspect='auto', extent=[min(x), max(x), min(y), max(y)],
                        origin='lower',)
 
+        if self.__baked_gradient:
+            # The image is replaced after the size of the figure is known.
+            # See the `__bake_gradients` method.
+            self.__gradients_to_bake.append((im, x, y, texture))
+            return
+
         # Add mask to the image, to appear only below the line plot
-        xy = np.column_stack([x, y])
-        xy = np.vstack(
-            [[min(x), min(y)], xy, [max(x), min(y)], [min(x), min(y)]])
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        x_min, x_max, y_min = x.min(), x.max(), y.min()
+
+        xy = np.empty((len(x) + 3, 2))
+        xy[1:-2, 0] = x
+        xy[1:-2, 1] = y
+        xy[[0, -1], 0] = x_min
+        xy[-2, 0] = x_max
+        xy[[0, -2, -1], 1] = y_min
+
         clip_path = Polygon(xy, facecolor='none',
                             edgecolor='none', closed=True)
         ax.add_patch(clip_path)
         im.set_clip_path(clip_path)
 
+    @classmethod
+    def _get_gradient_texture(cls, rgb: Tuple[float, float, float], alpha: float):
+        """ Returns a (read only) vertical gradient texture of the given
+        color, from transparent at the bottom to the given alpha at the top.
+        Each texture is generated only once. """
+
+        key = (tuple(rgb), alpha)
+        if key not in cls.__gradient_textures:
+            texture = np.empty((cls.GRADIENT_STEPS, 1, 4), dtype=float)
+            texture[:, :, :3] = rgb
+            texture[:, :, -1] = np.linspace(0, alpha, cls.GRADIENT_STEPS)[:, None]
+            texture.setflags(write=False)
+
+            cls.__gradient_textures[key] = texture
+
+        return cls.__gradient_textures[key]
+
+    def __bake_gradients(self,):
+        """ Replaces each gradient image (see `__plot_line_with_gradient`)
+        with an image in the size (in pixels) it is drawn in, where the area
+        above the line is transparent - so it is drawn without clipping. """
+
+        for im, x, y, texture in self.__gradients_to_bake:
+            left, right, bottom, top = im.get_extent()
+            (x0, y0), (x1, y1) = im.axes.transData.transform(
+                [(left, bottom), (right, top)])
+
+            width = max(int(round(abs(x1 - x0))), 1)
+            height = max(int(round(abs(y1 - y0))), 1)
+
+            # The centers of the pixels, in pixels from the bottom left
+            pixel_height = (top - bottom) / height
+            columns = left + (np.arange(width) + 0.5) * (right - left) / width
+            rows = np.arange(height, dtype=np.float32) + 0.5
+            line = (np.interp(columns, x, y) - bottom) / pixel_height
+
+            # The gradient of the texture, masked below the line (with half a
+            # pixel of antialiasing)
+            coverage = line.astype(np.float32)[None, :] - rows[:, None] + 0.5
+            np.clip(coverage, 0, 1, out=coverage)
+
+            gradient = np.interp(rows, np.linspace(0, height, len(texture)),
+                                 texture[:, 0, 3]).astype(np.float32) * 255
+            coverage *= gradient[:, None]
+
+            baked = np.empty((height, width, 4), dtype=np.uint8)
+            baked[:, :, :3] = np.round(np.asarray(texture[0, 0, :3]) * 255)
+            baked[:, :, 3] = coverage
+
+            im.set_data(baked)
+            im.set_interpolation("nearest")
+
+        self.__gradients_to_bake = list()
+
+    def _line_points(self,
+                     data: List[float],
+                     downsample: bool = False,
+                     width: Optional[int] = None,
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns the X and Y values of the points of the given data line
+        to draw - all of them, or (if `downsample` is set and the `width` of
+        the graph is known) only the points that can be seen. """
+
+        y_list = np.asarray(data, dtype=float)
+        if downsample and width:
+            x_list = self._downsample(y_list, buckets=width)
+            return x_list, y_list[x_list]
+
+        return np.arange(len(y_list)), y_list
+
+    @staticmethod
+    def _downsample(data: np.ndarray, buckets: int) -> np.ndarray:
+        """ Returns the (sorted) indices of the points of the data to draw, by
+        the min/max per pixel method: the data is split into the given number
+        of buckets (a bucket for each column of pixels), and only the minimum
+        and the maximum points of each bucket are drawn - so the line covers
+        the same range in each column as the full line. The first and the
+        last points, and the first minimum and maximum of the data, are
+        always included. """
+
+        count = len(data)
+        if buckets < 1 or count <= 2 * buckets:
+            return np.arange(count)
+
+        bucket_of = np.arange(count) * buckets // count
+        starts = np.searchsorted(bucket_of, np.arange(buckets))
+        ends = np.append(starts[1:], count) - 1
+
+        # Sorted by bucket, then by value. The sort is stable, so the first
+        # minimum of each bucket comes first.
+        order = np.lexsort((data, bucket_of))
+
+        return np.unique(np.concatenate([
+            order[starts], order[ends],
+            [0, count - 1, data.argmin(), data.argmax()],
+        ]))
+
     def __update_data_length(self, new_len: int):
         self._data_len = max(self._data_len, new_len)
 
@@ -230,14 +727,14 @@ class GraphGenerator(StringManagerDependent):
         ax.margins(x=0.1, y=0.1)  # "Zoom out" 10%
 
     @staticmethod
-    def __pixels_to_inches(px: Union[int, Tuple[int]]):
+    def __pixels_to_inches(px: Union[int, Tuple[int]], dpi: float = 100):
 
         if isinstance(px, int):
-            return px / 100
+            return px / dpi
 
         else:
             return tuple([
-                cur / 100
+                cur / dpi
                 for cur in px
             ])
 
@@ -251,10 +748,21 @@ class GraphGenerator(StringManagerDependent):
         return color
 
     @staticmethod
-    def __build_empty_fig():
-        fig = plt.figure()
-        ax = fig.add_subplot()
-        return fig, ax
+    def _build_empty_fig(rows: int = 1, columns: int = 1, count: int = None):
+        """ Returns a new figure attached to an Agg canvas, and a list of
+        `count` axes (`None` = all of the cells) in a grid of the given
+        size, ordered by rows. """
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        if count is None:
+            count = rows * columns
+
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        axes = [fig.add_subplot(rows, columns, index + 1) for index in range(count)]
+        return fig, axes
 
     @classmethod
     def _mark_point(cls, ax, point: Tuple[float], color="red"):
@@ -275,16 +783,487 @@ class GraphGenerator(StringManagerDependent):
                          offset: float,
                          ) -> None:
         x, y = point
-        x_str = self._string_manager.format_number(x, floating_max=3)
-        y_str = self._string_manager.format_number(y, floating_max=3)
-
-        text = text.replace("{x}", x_str).replace("{y}", y_str)
 
         config = {**self.TEXT_CONFIG,
                   "x": x,
                   "y": y+offset,
-                  "s": get_display(text),
+                  "s": self._mark_text(point, text),
                   "color": color,
                   }
 
         ax.text(**config)
+
+    def _mark_text(self, point: Tuple[float], text: str) -> str:
+        """ Returns the text of a marked point, where `{x}` and `{y}` are
+        replaced with the formatted coordinates of the point. """
+
+        x, y = point
+        x_str = self._string_manager.format_number(x, floating_max=3)
+        y_str = self._string_manager.format_number(y, floating_max=3)
+
+        text = text.replace("{x}", x_str).replace("{y}", y_str)
+        return get_display(text)
+
+
+class GraphGridGenerator(GraphGenerator):
+    """
+    Draws many graphs ("small multiples", like a graph for each country in a
+    region) into a grid of cells in a single figure, which is rasterized
+    only once. Each cell shows the data lines, the guide lines and the title
+    of one of the given graph generators, drawn with the styling of this
+    generator - so all of the cells look the same.
+
+    The cells are laid out automatically: by rows, in `columns` columns
+    (`None` = about as many columns as rows). Pass a small `scale` to
+    `to_img` so the lines and the texts fit into the cells.
+
+    Only the figure, its layout and its rasterizing are shared by the cells
+    - each cell still has its own axes, which are plotted and drawn like a
+    separate graph. So a grid is only about 1.3-2x faster than rendering
+    its graphs one by one (see `benchmarks/graph_grid.py`).
+    """
+
+    def __init__(self,
+                 graphs: List[GraphGenerator] = None,
+                 columns: Optional[int] = None,
+                 string_manager: StringManager = None,
+                 baked_gradient: bool = False,
+                 ):
+        super().__init__(string_manager, baked_gradient=baked_gradient)
+
+        assert columns is None or columns > 0, "Grid must have at least one column"
+
+        self.__graphs = list()
+        self.__columns = columns
+
+        for graph in graphs or list():
+            self.add_graph(graph)
+
+    def add_graph(self, graph: GraphGenerator) -> None:
+        """ Adds a cell with the given graph to the end of the grid. """
+        self.__graphs.append(graph)
+
+    @property
+    def graphs(self,) -> List[GraphGenerator]:
+        return list(self.__graphs)
+
+    @property
+    def grid_size(self,) -> Tuple[int, int]:
+        """ The number of rows and columns of the grid. """
+
+        count = max(len(self.__graphs), 1)
+        columns = self.__columns
+        if columns is None:
+            columns = math.ceil(math.sqrt(count))
+
+        columns = min(columns, count)
+        return math.ceil(count / columns), columns
+
+    def fingerprint(self, size=None, scale: float = 1) -> str:
+        hasher = hashlib.sha256(super().fingerprint(size, scale).encode())
+        hasher.update(repr(self.grid_size).encode())
+
+        for graph in self.__graphs:
+            hasher.update(graph.fingerprint().encode())
+
+        return hasher.hexdigest()
+
+    def _generate(self, width: Optional[int] = None):
+        rows, columns = self.grid_size
+        fig, axes = self._build_empty_fig(rows, columns, count=len(self.__graphs))
+
+        cell_width = None if width is None else width // columns
+        for ax, graph in zip(axes, self.__graphs):
+            self._plot_graph(ax, graph, width=cell_width)
+
+            # The axis are hidden anyway. Invisible axis are not measured by
+            # the layout, so their ticks are never generated - which takes
+            # most of the time of the layout of many cells.
+            ax.xaxis.set_visible(False)
+            ax.yaxis.set_visible(False)
+
+        return fig, axes
+
+
+class PillowGraphGenerator(GraphGenerator):
+    """
+    Draws the same graphs as `GraphGenerator`, directly with Pillow and NumPy
+    at the target size: a polyline, a gradient masked by a polygon, circles
+    and texts - without building a matplotlib figure. The sizes, the margins
+    and the layout follow the ones matplotlib uses, so the graphs look
+    (almost) the same, and are generated much faster.
+
+    The smooth gradients are drawn directly in the target size, and the
+    rest of the shapes are drawn (by their z-order) on a `_ShapesCanvas`.
+    """
+
+    SUPERSAMPLING = 2
+
+    # The defaults of matplotlib, in points (1/72 of an inch)
+    DEFAULT_SIZE = (6.4, 4.8)  # inches
+    LAYOUT_PAD = 1.08 * 10  # the padding of `tight_layout`
+    DASH_PATTERN = (3.7, 1.6)  # relative to the width of the line
+    SUBPLOT_BOX = (0.125, 0.12, 0.9, 0.89)  # left, top, right, bottom
+
+    # Scatter markers include their edge, which is as wide as a line
+    MARKER_RADIUS = (math.sqrt(GraphGenerator.MARKERS_CONFIG["s"]) + 1.5) / 2
+
+    # The path and the size (in points) of the font of the texts, and the
+    # fonts themselves, keyed by size in pixels - for each thread, because
+    # the fonts of Pillow can't be shared between threads.
+    # See the `__get_font` method for more information!
+    __font_info = None
+    __font_info_lock = threading.Lock()
+    __fonts_cache = threading.local()
+
+    @classmethod
+    def _backend_version(cls,) -> str:
+        return PIL.__version__
+
+    def _render(self, size=None, scale: float = 1,) -> Image.Image:
+        """ Draws the graph into a transparent Pillow image. """
+
+        dpi = self.DPI * scale
+        if size is None:
+            size = tuple([round(cur * dpi) for cur in self.DEFAULT_SIZE])
+
+        ss = self.SUPERSAMPLING
+        canvas_size = (size[0] * ss, size[1] * ss)
+        px = dpi / 72 * ss  # Pixels in a point
+
+        font = self.__get_font(px)
+        limits = self.__limits()
+        texts = self.__texts()
+
+        box = self.__layout(canvas_size, px, font, limits, texts)
+        to_px = self.__transform(box, limits)
+
+        lines = [
+            self._line_points(data["data"], data["downsample"], size[0])
+            for data in self._data
+        ]
+
+        img = Image.new("RGBA", size, color=(0, 0, 0, 0))
+        for data, (x_list, y_list) in zip(self._data, lines):
+            self.__draw_gradient(img, lambda x, y: [cur / ss for cur in to_px(x, y)],
+                                 x_list, y_list, data["color"])
+
+        canvas = _ShapesCanvas(img, ss)
+        data_len = max([len(data["data"]) for data in self._data], default=0)
+
+        # Drawn by the order of matplotlib's z-order
+        for data, (x_list, y_list) in zip(self._data, lines):
+            points = [to_px(x, y) for x, y in zip(x_list.tolist(), y_list.tolist())]
+            width = self.MAIN_LINES_CONFIG["linewidth"] * px
+            draw = canvas.draw(self.__to_rgb(data["color"]),
+                               self.__points_box(points, width / 2))
+            self.__draw_line(draw, points, width)
+
+        for guide in self._guides:
+            points = [to_px(0, guide["y"]), to_px(data_len - 1, guide["y"])]
+            width = self.GUIDE_LINES_CONFIG["linewidth"] * px
+            draw = canvas.draw(self.__to_rgb(guide["color"]),
+                               self.__points_box(points, width / 2))
+            self.__draw_dashed_line(draw, *points, width)
+
+        for text, color, pos in texts:
+            if pos is None:
+                # The title
+                pos = ((box[0] + box[2]) / 2,
+                       box[1] - self.TITLE_TEXT_CONFIG["pad"] * px)
+            else:
+                pos = to_px(*pos)
+
+            left, top, right, bottom = font.getbbox(text, anchor="mm")
+            text_box = (pos[0] + left, pos[1] + top, pos[0] + right, pos[1] + bottom)
+            canvas.draw(self.__to_rgb(color), text_box).text(
+                pos, text, fill=255, font=font, anchor="mm")
+
+        for point, color in self.__markers():
+            center = to_px(*point)
+            radius = self.MARKER_RADIUS * px
+            draw = canvas.draw(self.__to_rgb(color),
+                               self.__points_box([center], radius))
+            self.__draw_circle(draw, center, radius)
+
+        canvas.flush()
+        return img
+
+    def save(self, filepath: Union[str, BinaryIO], size=None, scale: float = 1):
+        """ Saves the graph as a transparent PNG image. """
+        self.to_img(size=size, scale=scale).save(filepath, format="PNG")
+
+    @staticmethod
+    def __points_box(points, pad: float) -> Tuple[float, float, float, float]:
+        """ Returns the bounding box of the given points, padded (and
+        rounded outwards) so it contains the shapes drawn around them. """
+
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        return (min(xs) - pad - 1, min(ys) - pad - 1,
+                max(xs) + pad + 1, max(ys) + pad + 1)
+
+    def __limits(self,) -> Tuple[float, float, float, float]:
+        """ Returns the limits of the axes, as (x min, y min, x max, y max),
+        with the margins matplotlib adds. """
+
+        ys = [y for data in self._data for y in data["data"]]
+        ys += [guide["y"] for guide in self._guides]
+        data_len = max([len(data["data"]) for data in self._data], default=1)
+
+        x_min, x_max = self.__with_margins(0, data_len - 1)
+        y_min, y_max = self.__with_margins(min(ys, default=0), max(ys, default=1))
+        return (x_min, y_min, x_max, y_max)
+
+    @staticmethod
+    def __with_margins(low: float, high: float, margin: float = 0.1):
+        delta = high - low
+        low, high = low - delta * margin, high + delta * margin
+
+        if high - low == 0:
+            # Like matplotlib's `nonsingular`
+            expand = 0.05 * abs(low) if low != 0 else 0.05
+            low, high = low - expand, high + expand
+
+        return low, high
+
+    def __texts(self,) -> List[tuple]:
+        """ Returns the texts of the graph, as (text, color, data point)
+        tuples. The data point of the title is `None`. """
+
+        texts = list()
+
+        for data in self._data:
+            values = data["data"]
+            offset = (max(values) - min(values)) * self.MARK_TEXT_OFFEST
+
+            for value, color, text, sign in (
+                    (min(values), data["min_color"], data["min_text"], -1),
+                    (max(values), data["max_color"], data["max_text"], 1)):
+                if color is not None:
+                    point = (values.index(value), value)
+                    texts.append((self._mark_text(point, text), color,
+                                  (point[0], value + offset * sign)))
+
+        title, color = self._title
+        if title is not None:
+            texts.append((get_display(title), color, None))
+
+        return texts
+
+    def __markers(self,) -> List[tuple]:
+        """ Returns the marked points of the graph, as (point, color) tuples. """
+
+        markers = list()
+
+        for data in self._data:
+            values = data["data"]
+            markers.append(((0, values[0]), data["color"]))
+            markers.append(((len(values) - 1, values[-1]), data["color"]))
+
+            for value, color in ((min(values), data["min_color"]),
+                                 (max(values), data["max_color"])):
+                if color is not None:
+                    markers.append(((values.index(value), value), color))
+
+        return markers
+
+    def __layout(self, size, px, font, limits, texts) -> Tuple[float, ...]:
+        """ Returns the box of the axes (in pixels), like `tight_layout`: the
+        texts outside of the default box are measured once, and the box is
+        shrinked so they fit inside of the image. """
+
+        width, height = size
+        box = (self.SUBPLOT_BOX[0] * width, self.SUBPLOT_BOX[1] * height,
+               self.SUBPLOT_BOX[2] * width, self.SUBPLOT_BOX[3] * height)
+        to_px = self.__transform(box, limits)
+
+        left, top, right, bottom = box
+        for text, _, pos in texts:
+            if pos is None:
+                pos = ((box[0] + box[2]) / 2,
+                       box[1] - self.TITLE_TEXT_CONFIG["pad"] * px)
+            else:
+                pos = to_px(*pos)
+
+            text_box = font.getbbox(text, anchor="mm")
+            left = min(left, pos[0] + text_box[0])
+            top = min(top, pos[1] + text_box[1])
+            right = max(right, pos[0] + text_box[2])
+            bottom = max(bottom, pos[1] + text_box[3])
+
+        pad = self.LAYOUT_PAD * px
+        return (pad + box[0] - left,
+                pad + box[1] - top,
+                width - pad - (right - box[2]),
+                height - pad - (bottom - box[3]))
+
+    @staticmethod
+    def __transform(box, limits):
+        """ Returns a function that converts data coordinates into pixels
+        inside of the given box. """
+
+        x_min, y_min, x_max, y_max = limits
+        x_scale = (box[2] - box[0]) / (x_max - x_min)
+        y_scale = (box[3] - box[1]) / (y_max - y_min)
+
+        def to_px(x, y):
+            return (box[0] + (x - x_min) * x_scale,
+                    box[3] - (y - y_min) * y_scale)
+
+        return to_px
+
+    def __draw_gradient(self, img: Image.Image, to_px, x_list, y_list, color):
+        """ Fills the area below the line with a vertical alpha gradient - from
+        transparent in the minimum of the data to opaque in its maximum. """
+
+        left, bottom = to_px(x_list[0], y_list.min())
+        right, top = to_px(x_list[-1], y_list.max())
+        box = (int(left), int(top), math.ceil(right), math.ceil(bottom))
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return
+
+        polygon = [(left, bottom)] + \
+            [to_px(x, y) for x, y in zip(x_list.tolist(), y_list.tolist())] + \
+            [(right, bottom)]
+
+        mask = Image.new("L", (box[2] - box[0], box[3] - box[1]))
+        ImageDraw.Draw(mask).polygon(
+            [(x - box[0], y - box[1]) for x, y in polygon], fill=255)
+
+        rows = np.arange(box[1], box[3]) + 0.5
+        alpha = np.clip((bottom - rows) / (bottom - top), 0, 1)
+        mask = np.asarray(mask) * alpha[:, None]
+
+        gradient = Image.new("RGBA", mask.shape[::-1], color=self.__to_rgb(color))
+        gradient.putalpha(Image.fromarray(mask.astype(np.uint8)))
+        img.alpha_composite(gradient, dest=box[:2])
+
+    def __draw_line(self, draw: ImageDraw.ImageDraw, points, width):
+        """ Draws a line with round caps and joins. """
+
+        draw.line(points, fill=255, width=round(width))
+        for point in points:
+            self.__draw_circle(draw, point, width / 2)
+
+    def __draw_dashed_line(self, draw: ImageDraw.ImageDraw, start, end, width):
+        """ Draws a dashed horizontal line with round caps, with the dash
+        pattern of matplotlib. """
+
+        dash, gap = [cur * width for cur in self.DASH_PATTERN]
+        length = end[0] - start[0]
+        x, y = start
+
+        position = 0
+        while position < length:
+            dash_end = min(position + dash, length)
+            self.__draw_line(draw, [(x + position, y), (x + dash_end, y)], width)
+            position += dash + gap
+
+    @staticmethod
+    def __draw_circle(draw: ImageDraw.ImageDraw, center, radius):
+        x, y = center
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=255)
+
+    @staticmethod
+    def __to_rgb(color) -> Tuple[int, int, int]:
+        if color is None:
+            return (0, 0, 0)
+        if isinstance(color, tuple):
+            return color
+        return ImageColor.getrgb(color)
+
+    @classmethod
+    def __get_font(cls, px: float) -> ImageFont.FreeTypeFont:
+        """ Returns the font of the texts, where a point is `px` pixels. The
+        font is the one matplotlib uses - which is found (with matplotlib)
+        only the first time a font is needed. Each thread has its own
+        fonts. """
+
+        with cls.__font_info_lock:
+            if cls.__font_info is None:
+                from matplotlib.font_manager import FontProperties, findfont
+
+                cls.__font_info = (
+                    findfont(FontProperties(weight="bold")),
+                    FontProperties(
+                        size=cls.TEXT_CONFIG["fontsize"]).get_size_in_points(),
+                )
+
+        fonts = getattr(cls.__fonts_cache, "fonts", None)
+        if fonts is None:
+            fonts = cls.__fonts_cache.fonts = dict()
+
+        path, points = cls.__font_info
+        size = round(points * px)
+        if size not in fonts:
+            fonts[size] = ImageFont.truetype(path, size=size)
+        return fonts[size]
+
+
+class _ShapesCanvas:
+    """
+    Draws solid shapes onto an RGBA image with antialiasing. Each shape is
+    drawn (with `fill=255`) into a mask that is larger than the image by the
+    supersampling factor. When the color changes, the covered region of the
+    mask is downsampled and composited onto the image with the previous
+    color, and the mask is cleared - so the shapes keep their order.
+    """
+
+    def __init__(self, img: Image.Image, supersampling: int):
+        self.__img = img
+        self.__ss = supersampling
+
+        self.__mask = Image.new("L", (img.width * supersampling,
+                                      img.height * supersampling))
+        self.__draw = ImageDraw.Draw(self.__mask)
+
+        self.__color = None
+        self.__box = None
+
+    def draw(self, color: Tuple[int, int, int], box) -> ImageDraw.ImageDraw:
+        """ Returns the `ImageDraw` instance of the mask, that a shape with
+        the given color and bounding box (in the supersampled size) should be
+        drawn with. """
+
+        if color != self.__color:
+            self.flush()
+            self.__color = color
+
+        if self.__box is None:
+            self.__box = list(box)
+        else:
+            self.__box = [min(self.__box[0], box[0]), min(self.__box[1], box[1]),
+                          max(self.__box[2], box[2]), max(self.__box[3], box[3])]
+
+        return self.__draw
+
+    def flush(self,):
+        """ Composites the drawn shapes onto the image, and clears the mask. """
+
+        if self.__box is None:
+            return
+
+        ss = self.__ss
+        left = max(int(self.__box[0] // ss), 0)
+        top = max(int(self.__box[1] // ss), 0)
+        right = min(math.ceil(self.__box[2] / ss), self.__img.width)
+        bottom = min(math.ceil(self.__box[3] / ss), self.__img.height)
+        self.__box = None
+
+        if right <= left or bottom <= top:
+            return
+
+        mask_box = (left * ss, top * ss, right * ss, bottom * ss)
+        layer = Image.new("RGBA", (right - left, bottom - top), color=self.__color)
+        layer.putalpha(self.__mask.reduce(ss, box=mask_box))
+
+        self.__img.alpha_composite(layer, dest=(left, top))
+        self.__mask.paste(0, box=mask_box)
+
+
+# The graph generators, by the name of their backend
+GRAPH_BACKENDS = {
+    "matplotlib": GraphGenerator,
+    "pillow": PillowGraphGenerator,
+}
@@ -1 +0,0 @@
-sudo apt-get install locales-all
\ No newline at end of file
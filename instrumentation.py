@@ -0,0 +1,194 @@
+# Built in modules
+from typing import Callable, Dict, List, Optional
+import contextlib
+import functools
+import threading
+import time
+import tracemalloc
+
+# A hook is called once for each finished stage, with the name of the stage,
+# the wall time and the CPU time (in seconds) and the peak allocated bytes.
+# The CPU time is of the thread that ran the stage - work that the stage
+# waits for in other threads (like graphs rendered in an executor) is
+# measured by their own stages. The peak is the most memory that was
+# allocated above the memory at the start of the stage - by the whole
+# process, because `tracemalloc` traces all of the threads together.
+StageHook = Callable[[str, float, float, int], None]
+
+_hooks: List[StageHook] = list()
+
+# The peak traced memory of each stage that is being measured. The peak of
+# `tracemalloc` is reset at the start of each stage, so it is saved into the
+# stages around it first. See the `_measure` function for more information!
+_open_peaks: List[list] = list()
+_peaks_lock = threading.Lock()
+
+
+def add_hook(hook: StageHook) -> None:
+    """ Registers the given hook. From now on, the hook is called each time
+    one of the instrumented stages is finished. """
+
+    _hooks.append(hook)
+
+
+def remove_hook(hook: StageHook) -> None:
+    _hooks.remove(hook)
+
+
+def is_enabled() -> bool:
+    """ Returns `True` if at least one hook is registered. """
+    return bool(_hooks)
+
+
+@contextlib.contextmanager
+def instrumented(hook: StageHook, trace_allocations: bool = False):
+    """ Registers the given hook inside of the `with` block. If
+    `trace_allocations` is `True`, also traces the memory allocations (using
+    `tracemalloc`) in the block, which is much slower. Without it, the
+    peak allocated bytes are reported only if `tracemalloc` is already
+    tracing. """
+
+    start_tracing = trace_allocations and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+        if start_tracing:
+            tracemalloc.stop()
+
+
+@contextlib.contextmanager
+def _measure(name: str):
+    """ Measures the code inside of the `with` block, and passes the results
+    to all of the registered hooks. """
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        with _peaks_lock:
+            start_memory = _update_peaks()
+            peak = [start_memory]
+            _open_peaks.append(peak)
+
+    start_cpu = time.thread_time()
+    start_wall = time.perf_counter()
+
+    try:
+        yield
+
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = time.thread_time() - start_cpu
+
+        allocated = 0
+        if tracing:
+            with _peaks_lock:
+                _update_peaks()
+                _open_peaks[:] = [cur for cur in _open_peaks if cur is not peak]
+            allocated = max(peak[0] - start_memory, 0)
+
+        for hook in list(_hooks):
+            hook(name, wall, cpu, allocated)
+
+
+def _update_peaks() -> int:
+    """ Saves the peak traced memory into all of the stages that are being
+    measured, resets it, and returns the current traced memory. Must be
+    called with `_peaks_lock`. """
+
+    current, peak = tracemalloc.get_traced_memory()
+    for cur in _open_peaks:
+        cur[0] = max(cur[0], peak)
+
+    tracemalloc.reset_peak()
+    return current
+
+
+def stage(name: str):
+    """ Returns a context manager that measures the code inside of it as the
+    stage with the given name. When no hooks are registered, returns a
+    context manager that does nothing. """
+
+    if not _hooks:
+        return contextlib.nullcontext()
+    return _measure(name)
+
+
+def timed(name: str):
+    """ A decorator that measures each call of the decorated function as the
+    stage with the given name. When no hooks are registered, the function is
+    called directly. """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return func(*args, **kwargs)
+
+            with _measure(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class StageReport:
+    """
+    A hook that aggregates the measurements of each stage: the number of
+    calls, the total wall time, the total CPU time and the highest peak
+    allocated bytes (see `StageHook`). Reports of different runs (or processes) can be merged, and the
+    result can be written as a compact table.
+    """
+
+    def __init__(self, stats: Optional[Dict[str, list]] = None):
+        self.__stats = dict()
+        self.__lock = threading.Lock()  # Stages may finish in other threads
+        if stats is not None:
+            self.merge(stats)
+
+    def __call__(self, name: str, wall: float, cpu: float, allocated: int):
+        self.merge({name: [1, wall, cpu, allocated]})
+
+    @property
+    def stats(self,) -> Dict[str, list]:
+        """ A dictionary that maps each stage name to a list with the number of
+        calls, the wall time, the CPU time and the peak allocated bytes. """
+        return self.__stats
+
+    def merge(self, stats: Dict[str, list]) -> None:
+        """ Adds the given stats (see the `stats` property) to this report. """
+
+        with self.__lock:
+            for name, values in stats.items():
+                calls, wall, cpu, peak = self.__stats.get(name, [0, 0, 0, 0])
+                self.__stats[name] = [
+                    calls + values[0],
+                    wall + values[1],
+                    cpu + values[2],
+                    max(peak, values[3]),
+                ]
+
+    def to_string(self,) -> str:
+        lines = [
+            f"{'stage':<20}{'calls':>8}{'wall (s)':>12}{'cpu (s)':>12}{'peak (KiB)':>14}"
+        ]
+
+        stages = sorted(self.stats.items(),
+                        key=lambda item: item[1][1], reverse=True)
+        for name, (calls, wall, cpu, peak) in stages:
+            lines.append(
+                f"{name:<20}{calls:>8}{wall:>12.3f}{cpu:>12.3f}{peak / 1024:>14.1f}")
+
+        return "\n".join(lines)
+
+    def write(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_string() + "\n")
+
+    def __str__(self,):
+        return self.to_string()
@@ -0,0 +1,564 @@
+# Built in modules
+from typing import Tuple, List, Optional, Iterator
+from concurrent.futures import Executor, Future
+import json
+import logging
+
+# Pillow
+from PIL import Image
+
+# My code
+from translator import StringManager
+from painter import ImageGenerator, ImageLayer
+from grapher import GRAPH_BACKENDS
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+
+class PosterLayout:
+    """
+    A declarative description of a poster: the path to the template image,
+    and an ordered list of named slots (the background, the data posters,
+    the titles, the graphs and the subtitle) with their relative positions,
+    sizes and colors. See `assets/layouts/default.json` for an example.
+
+    The layout is compiled only once for each size of the template into a
+    `CompiledPosterLayout`, where everything is already in pixels. Generating
+    an image only binds the data to the compiled slots.
+    """
+
+    SLOT_TYPES = {"background", "data", "title", "graph", "subtitle"}
+
+    def __init__(self, spec: dict):
+        self.__validate_spec(spec)
+        self.__spec = spec
+        self.__compiled = dict()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'PosterLayout':
+        """ Loads the layout spec from the given json file. """
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __validate_spec(self, spec: dict):
+        assert isinstance(spec, dict), "Layout must be a dictionary"
+        assert isinstance(spec.get("template"),
+                          str), "Layout template must be a path string"
+        assert isinstance(spec.get("slots"), list), "Layout slots must be a list"
+
+        names = set()
+        for slot in spec["slots"]:
+            assert isinstance(slot, dict), "Layout slot must be a dictionary"
+            assert "name" in slot, "Layout slot must have a name"
+            assert slot["name"] not in names, "Layout slot names must be unique"
+            assert slot.get("type") in self.SLOT_TYPES, \
+                f"Layout slot type must be one of {self.SLOT_TYPES}"
+            assert slot.get("backend", "matplotlib") in GRAPH_BACKENDS, \
+                f"Layout graph backend must be one of {set(GRAPH_BACKENDS)}"
+            names.add(slot["name"])
+
+    @property
+    def spec(self,) -> dict:
+        return self.__spec
+
+    @property
+    def slot_names(self,) -> List[str]:
+        return [slot["name"] for slot in self.spec["slots"]]
+
+    @property
+    def template_size(self,) -> Tuple[int, int]:
+        """ The original size of the template image. """
+
+        with Image.open(self.spec["template"]) as template:
+            return template.size
+
+    def compile(self, size: Optional[Tuple[int, int]] = None) -> 'CompiledPosterLayout':
+        """ Returns the layout compiled for the template resized to the given
+        size (`None` = the original size of the template). Each size is
+        compiled only once. """
+
+        if size is not None:
+            size = tuple(size)
+
+        if size not in self.__compiled:
+            logger.info("Compiling layout for size %s...", size)
+
+            with stage("layout_compile"):
+                template = Image.open(self.spec["template"])
+                scale = 1
+
+                if size is not None and size != template.size:
+                    scale = size[0] / template.width
+                    template = template.resize(size, Image.LANCZOS)
+                else:
+                    template.load()
+
+                self.__compiled[size] = CompiledPosterLayout(
+                    self.spec, template, scale=scale)
+
+        return self.__compiled[size]
+
+
+class RenderSession:
+    """
+    The state of the incremental renders of a poster: the layers and the
+    image of its last render. Created and owned by the caller (like a bot
+    that generates its poster again and again), and passed to
+    `CompiledPosterLayout.render` - so the posters of different bots never
+    share (and overwrite) their state, and the state is freed together with
+    its owner. Not thread safe - use a session for each thread.
+    """
+
+    def __init__(self,):
+        self.__layout = None
+        self.__last_render = None
+
+    def last_render(self, layout: 'CompiledPosterLayout') -> Optional[dict]:
+        """ Returns the last render of the given layout in this session
+        (`None` if the last render was of another layout). """
+
+        if self.__layout is not layout:
+            return None
+        return self.__last_render
+
+    def save(self, layout: 'CompiledPosterLayout', render: dict) -> None:
+        self.__layout = layout
+        self.__last_render = render
+
+    def clear(self,) -> None:
+        """ Drops the last render, so the next one is a full render. """
+        self.__layout = None
+        self.__last_render = None
+
+
+class CompiledPosterLayout:
+    """
+    A `PosterLayout` compiled for a specific template size: the template
+    image is loaded (and resized), and the geometry of each slot is
+    calculated in pixels, together with the fonts it needs. Created by the
+    `PosterLayout.compile` method, and should not be initialized by the user.
+    """
+
+    def __init__(self, spec: dict, template: Image.Image, scale: float = 1):
+        self.__template = template
+        self.__scale = scale
+
+        generator = ImageGenerator(template, scale=scale)
+        self.__slots = [
+            self.__compile_slot(generator, slot)
+            for slot in spec["slots"]
+        ]
+
+    @property
+    def size(self,) -> Tuple[int, int]:
+        return self.__template.size
+
+    @property
+    def scale(self,) -> float:
+        return self.__scale
+
+    @property
+    def slot_names(self,) -> List[str]:
+        return [slot["name"] for slot in self.__slots]
+
+    @staticmethod
+    def __compile_slot(generator: ImageGenerator, slot: dict) -> dict:
+        """ Returns a copy of the given slot, with the geometry of the slot
+        (in pixels) saved under the `geometry` key. """
+
+        slot_type = slot["type"]
+
+        if slot_type == "data":
+            geometry = generator.data_geometry(
+                count=slot["count"],
+                start_relative_y=slot["start_y"],
+                end_relative_y=slot["end_y"],
+            )
+
+        elif slot_type == "title":
+            geometry = generator.poster_title_geometry(
+                y_relative=slot.get("y", 0.5),
+                side=slot.get("side", "m"),
+            )
+
+        elif slot_type == "graph":
+            geometry = generator.graph_geometry(
+                relative_size=slot["size"],
+                relative_pos=slot["pos"],
+            )
+
+        elif slot_type == "subtitle":
+            geometry = generator.subtitle_geometry()
+
+        else:
+            # The background covers the whole image
+            geometry = dict()
+
+        return {**slot, "geometry": geometry}
+
+    def render(self,
+               bindings: dict,
+               string_manager: StringManager = None,
+               session: Optional[RenderSession] = None,
+               executor: Optional[Executor] = None,
+               ) -> Image.Image:
+        """ Generates the image, where `bindings` maps the name of each slot
+        to the data it shows:
+
+        *   `background` slots - the R value
+        *   `data` slots - a list of `SingleDataPoster` instances
+        *   `title` slots - a `PosterText` instance
+        *   `graph` slots - a dictionary with the `data` list, the `r_value`
+            and (optionally) the `title` of the graph and the `backend` that
+            draws it (instead of the `backend` of the slot)
+        *   `subtitle` slots - the subtitle string
+
+        If a `session` is given, the layers of its last render are reused:
+        only the elements whose data changed are rendered again, and only
+        the regions they cover are composed again on top of the last image.
+        Without a session, the whole image is rendered.
+
+        If an `executor` (like a `ThreadPoolExecutor`) is given, the graphs
+        are rendered in it, in parallel to the rest of the elements.
+        """
+
+        generator, string_manager = self.__prepare_render(bindings, string_manager)
+
+        last = session.last_render(self) if session is not None else None
+        if last is None:
+            last = {"background": (None, None), "layers": dict()}
+
+        background_fingerprint, background = last["background"]
+        layers = dict()
+        changed = list()  # (key, cached layer) of the rendered layers
+
+        for slot in self.__slots:
+            data = bindings[slot["name"]]
+
+            if slot["type"] != "background":
+                changed += self.__render_slot(generator, slot, data, string_manager,
+                                              last["layers"], layers, executor)
+
+            elif data != background_fingerprint:
+                background_fingerprint = data
+                background = generator.background_image(data)
+
+        for key, (fingerprint, layer) in list(layers.items()):
+            if isinstance(layer, Future):
+                layers[key] = (fingerprint, layer.result())
+
+        if background is None:
+            # A layout without a background slot
+            background = self.__template
+
+        if background_fingerprint != last["background"][0]:
+            last = {"layers": last["layers"]}  # Everything is composed again
+        image = self.__compose(last, background, layers, changed)
+
+        if session is None:
+            return image
+
+        session.save(self, {
+            "background": (background_fingerprint, background),
+            "layers": layers,
+            "image": image,
+        })
+
+        return image.copy()
+
+    def __render_slot(self,
+                      generator: ImageGenerator,
+                      slot: dict,
+                      data,
+                      string_manager: StringManager,
+                      last_layers: dict,
+                      layers: dict,
+                      executor: Optional[Executor],
+                      ) -> list:
+        """ Adds the layers of the given slot to `layers` - the layers of the
+        last render that didn't change are reused, and the rest are rendered
+        (graphs in the `executor`, if given). Returns the (key, cached layer)
+        of each layer that was rendered. """
+
+        changed = list()
+
+        for key, fingerprint, render in self.__slot_layers(
+                generator, slot, data, string_manager):
+
+            cached = last_layers.get(key)
+            if cached is not None and cached[0] == fingerprint:
+                layers[key] = cached
+                continue
+
+            if executor is not None and slot["type"] == "graph":
+                # Only the graphs are rendered in the executor - the
+                # fonts of Pillow can't be shared between threads, and
+                # only the graph backends keep their fonts per thread
+                layers[key] = (fingerprint, executor.submit(render))
+            else:
+                layers[key] = (fingerprint, render())
+            changed.append((key, cached))
+
+        return changed
+
+    def __compose(self,
+                  last: dict,
+                  background: Image.Image,
+                  layers: dict,
+                  changed: list,
+                  ) -> Image.Image:
+        """ Returns the image of the given background and layers. Only the
+        dirty regions are composed again on top of the last image, if there
+        is one. """
+
+        if "image" not in last:
+            image = background.copy()
+            for _, layer in layers.values():
+                layer.paste_on(image)
+            return image
+
+        image = last["image"].copy()
+        for box in self.__dirty_regions(last["layers"], layers, changed):
+            self.__compose_region(image, background, layers, box)
+
+        return image
+
+    @staticmethod
+    def __dirty_regions(last_layers: dict, layers: dict, changed: list) -> list:
+        """ Returns the regions that need to be composed again: the regions
+        of the rendered layers (before and after they changed), and of the
+        layers that are not drawn anymore. """
+
+        dirty = list()
+        for key, cached in changed:
+            dirty.append(layers[key][1].box)
+            if cached is not None:
+                dirty.append(cached[1].box)
+
+        dirty += [
+            layer.box
+            for key, (_, layer) in last_layers.items()
+            if key not in layers
+        ]
+
+        return dirty
+
+    def animate(self,
+                bindings: dict,
+                frames: Optional[int] = None,
+                string_manager: StringManager = None,
+                ) -> Iterator[Image.Image]:
+        """ Yields the frames of an animation of the poster over time. The
+        bindings are the same as in the `render` method, except that:
+
+        *   `background` slots - a list with the R value of each frame (or a
+            single R value for all of the frames)
+        *   `graph` slots - the graph grows by a day in each frame, and the
+            last frame shows the whole graph
+
+        `frames` is the number of frames, and defaults to the length of the
+        R values list. The static elements are rendered only once, each
+        background only once for each R value, and the graphs draw only
+        their changing parts in each frame (see `GraphGenerator.animate`).
+        Only the current frame is kept in memory, so the frames can be
+        streamed into an `AnimationEncoder`.
+        """
+
+        generator, string_manager = self.__prepare_render(bindings, string_manager)
+
+        r_values = [bindings[slot["name"]] for slot in self.__slots
+                    if slot["type"] == "background"]
+        r_values = r_values[-1] if r_values else None
+
+        if frames is None:
+            assert isinstance(r_values, list), \
+                "The number of frames must be given without a list of R values"
+            frames = len(r_values)
+
+        if not isinstance(r_values, list):
+            r_values = [r_values] * frames
+
+        assert frames > 0, "An animation must have at least one frame"
+        assert len(r_values) == frames, \
+            "The background must have an R value for each frame"
+
+        # The layers of the poster, by their order: single layers of the
+        # static elements, and iterators over the layers of the graphs
+        layers = list()
+        for slot in self.__slots:
+            data = bindings[slot["name"]]
+
+            if slot["type"] == "graph":
+                layers.append(self.__graph_animation_layers(
+                    generator, slot, data, frames))
+
+            elif slot["type"] != "background":
+                layers += [
+                    render() for _, _, render in self.__slot_layers(
+                        generator, slot, data, string_manager)
+                ]
+
+        backgrounds = dict()
+        for r_value in r_values:
+            if r_value not in backgrounds:
+                backgrounds[r_value] = self.__template if r_value is None \
+                    else generator.background_image(r_value)
+
+            image = backgrounds[r_value].copy()
+            for layer in layers:
+                if not isinstance(layer, ImageLayer):
+                    layer = next(layer)
+                layer.paste_on(image)
+
+            yield image
+
+    @classmethod
+    def __graph_animation_layers(cls,
+                                 generator: ImageGenerator,
+                                 slot: dict,
+                                 data: dict,
+                                 frames: int,
+                                 ) -> Iterator[ImageLayer]:
+        """ Yields the layer of the given graph slot in each frame, where
+        the graph grows by a day in each frame. Graphs shorter than the
+        animation stay on their first day until the rest of the frames. """
+
+        graph_gen = cls.__build_graph(generator, slot, data)
+
+        length = len(data["data"])
+        start = max(length - frames + 1, 1)
+
+        layers = generator.graph_animation_layers(
+            graph_gen, start=start, **slot["geometry"])
+        first = next(layers)
+
+        for _ in range(frames - (length - start)):
+            yield first
+        yield from layers
+
+    def __prepare_render(self,
+                         bindings: dict,
+                         string_manager: Optional[StringManager],
+                         ) -> Tuple[ImageGenerator, StringManager]:
+        """ Checks the bindings, and returns the image generator (and the
+        string manager) that render the layers. """
+
+        missing = [name for name in self.slot_names if name not in bindings]
+        if missing:
+            raise ValueError(f"Missing data for the layout slots: {missing}")
+
+        if string_manager is None:
+            string_manager = StringManager()
+
+        generator = ImageGenerator(self.__template,
+                                   string_manager=string_manager,
+                                   scale=self.scale)
+
+        return generator, string_manager
+
+    @staticmethod
+    def __compose_region(image: Image.Image,
+                         background: Image.Image,
+                         layers: dict,
+                         box: Tuple[int, int, int, int],
+                         ) -> None:
+        """ Composes the given region of the image again, from the background
+        and the layers that overlap it. """
+
+        box = (max(box[0], 0), max(box[1], 0),
+               min(box[2], image.width), min(box[3], image.height))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            return
+
+        region = background.crop(box)
+        for _, layer in layers.values():
+            if layer.overlaps(box):
+                layer.paste_on(region, origin=box[:2])
+
+        image.paste(region, box=box[:2])
+
+    @staticmethod
+    def __slot_layers(generator: ImageGenerator,
+                      slot: dict,
+                      data,
+                      string_manager: StringManager,
+                      ) -> list:
+        """ Returns the layers of the given slot, as a list of (key,
+        fingerprint, render) tuples - where `render` generates the layer.
+        Layers with the same key and fingerprint are identical. """
+
+        name = slot["name"]
+        slot_type = slot["type"]
+        geometry = slot["geometry"]
+        sm_fingerprint = string_manager.fingerprint
+
+        if slot_type == "data":
+            return [
+                (
+                    (name, index),
+                    (poster.fingerprint, sm_fingerprint),
+                    lambda poster=poster, x=x: generator.data_poster_layer(
+                        poster,
+                        center_x=x,
+                        start_y=geometry["start_y"],
+                        height=geometry["height"],
+                    ),
+                )
+                for index, (poster, x) in enumerate(zip(data, geometry["centers_x"]))
+            ]
+
+        elif slot_type == "title":
+            return [(
+                name,
+                data.fingerprint,
+                lambda: generator.poster_title_layer(
+                    data, color=slot.get("color", "black"), **geometry),
+            )]
+
+        elif slot_type == "graph":
+            backend = data.get("backend", slot.get("backend", "matplotlib"))
+
+            def render():
+                graph_gen = CompiledPosterLayout.__build_graph(generator, slot, data)
+                return generator.graph_layer(graph_gen, **geometry)
+
+            fingerprint = (tuple(data["data"]), data["r_value"],
+                           data.get("title"), backend, sm_fingerprint)
+            return [(name, fingerprint, render)]
+
+        elif slot_type == "subtitle":
+            return [(
+                name,
+                data,
+                lambda: generator.subtitle_layer(
+                    data, color=slot.get("color", "black"), **geometry),
+            )]
+
+        return list()
+
+    @staticmethod
+    def __build_graph(generator: ImageGenerator,
+                      slot: dict,
+                      data: dict,
+                      ):
+        """ Returns the graph generator of the given graph slot. """
+
+        backend = data.get("backend", slot.get("backend", "matplotlib"))
+
+        graph_gen = generator.build_graph(
+            data["data"],
+            r_value=data["r_value"],
+            title=data.get("title"),
+            title_color=slot.get("title_color"),
+            accent_color=slot.get("accent_color", "black"),
+            backend=backend,
+        )
+
+        guide_line = slot.get("guide_line")
+        if guide_line is not None:
+            graph_gen.add_guide_line(
+                y=guide_line["y"], color=guide_line.get("color", "red"))
+
+        return graph_gen
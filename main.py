@@ -1,15 +1,21 @@
 import os
+import shutil
+import tempfile
+import time
 import typing
 import json
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 
 import logging
 from logging.handlers import TimedRotatingFileHandler
 
 from PIL import Image
-from instabot import Bot as Instabot
 
-from translator import Country, StringManager
-from painter import ImageGenerator, SingleDataPoster, PosterText
+from translator import Country, StringManager, TranslationCache
+from painter import SingleDataPoster, PosterText, OutputProfile, ImageEncoder, AnimationEncoder
+from layout import PosterLayout, RenderSession
+from grapher import GraphGenerator, GraphRenderCache
+from instrumentation import timed, instrumented, StageReport
 from hopkins_api import CovidHistoryDatabase, CountryData
 
 
@@ -26,19 +32,37 @@ logger.addHandler(file_handler)
 
 class CovidStatsInstagramBot:
 
-    TEMPLATE_IMAGE_PATH = os.path.join('assets', 'background-template.png')
+    LAYOUT_PATH = os.path.join('assets', 'layouts', 'default.json')
     STATS_OF_X_DAYS = 60
 
-    SUBTITLES_COLOR = "#aaaaaa"
-    ACCENT_COLOR = "#424242"
+    FEED_PROFILE = OutputProfile("feed", (1080, 1080))
+    STORY_PROFILE = OutputProfile("story", (1080, 1920))
+    THUMBNAIL_PROFILE = OutputProfile("thumbnail", (320, 320))
+
+    UPLOAD_ENCODER = ImageEncoder("JPEG", quality=90)
+    ANIMATION_ENCODER = AnimationEncoder("GIF", fps=4)
 
     __api = None
 
+    # Loaded layouts, keyed by the path to the layout file.
+    # See the `_get_layout` method for more information!
+    __layouts = dict()
+
     def __init__(self,
                  country_code: str,
                  username: str = None,
                  string_manager: StringManager = None,
+                 country_data: CountryData = None,
+                 layout_path: str = None,
+                 graph_executor: Executor = None,
                  ):
+        """ If `country_data` is not given, the data is downloaded from the
+        API the first time it is needed. If `layout_path` is not given, the
+        default layout (`LAYOUT_PATH`) is used - other layouts may arrange
+        any of its slots, under the same names (see `__layout_bindings`).
+        If `graph_executor` (like a `ThreadPoolExecutor`) is given, the
+        graphs are rendered in it. """
+
         self._country = Country(country_code)
 
         if string_manager is None:
@@ -46,9 +70,18 @@ class CovidStatsInstagramBot:
             string_manager.config_country_translator(self._country)
         self._sm = string_manager
 
-        self.__country_data_obj = None
+        self.__country_data_obj = country_data
         self.__insta_username = username
 
+        if layout_path is None:
+            layout_path = self.LAYOUT_PATH
+        self.__layout_path = layout_path
+        self.__graph_executor = graph_executor
+
+        # The incremental render state of the poster, for each size.
+        # See the `__render_session` method for more information!
+        self.__render_sessions = dict()
+
     def __get_api(self,) -> CovidHistoryDatabase:
         """ Returns the `CovidHistoryDatabase` instance used to generate
         the image. """
@@ -57,6 +90,7 @@ class CovidStatsInstagramBot:
             self.__api = CovidHistoryDatabase()
         return self.__api
 
+    @timed("country_data")
     def _get_country_data(self,) -> typing.Optional[CountryData]:
         """ Returns an instance that represents the covid stats in the current
         country. Returns `None` if data is not found. """
@@ -66,137 +100,280 @@ class CovidStatsInstagramBot:
 
         return self.__country_data_obj
 
+    @classmethod
+    def _get_layout(cls, path: str) -> PosterLayout:
+        """ Returns the layout saved in the given file. Each layout file is
+        loaded only once, and its compiled sizes are shared between all of the
+        bots that use it. """
+
+        if path not in cls.__layouts:
+            cls.__layouts[path] = PosterLayout.from_file(path)
+        return cls.__layouts[path]
+
     @property
     def instagram_username(self,):
         return self.__insta_username
 
+    @timed("to_image")
     def to_image(self,
                  username: str = None,
-                 ) -> Image.Image:
+                 profiles: typing.Iterable[OutputProfile] = None,
+                 ) -> typing.Union[Image.Image, typing.Dict[str, Image.Image]]:
         """ Returns a Pillow Image instance that represents the covid
-        status in the country. """
+        status in the country.
+
+        If a collection of `OutputProfile` instances is given, returns a
+        dictionary that maps the name of each profile to its image instead.
+        The data and the strings are loaded only once, and the image is
+        generated only once for each distinct size - profiles that share the
+        same size share the generated image. """
 
         if username is None:
             username = self.instagram_username
 
+        layout = self._get_layout(self.__layout_path)
         data = self._get_country_data()
+        strings = self.__image_strings(data, username)
+
+        if profiles is None:
+            return layout.compile().render(
+                self.__layout_bindings(layout, data, strings), self._sm,
+                session=self.__render_session(layout.template_size),
+                executor=self.__graph_executor)
+
+        generated = dict()
+        images = dict()
+
+        for profile in profiles:
+            size = profile.content_size(layout.template_size)
+
+            if size not in generated:
+                generated[size] = layout.compile(size).render(
+                    self.__layout_bindings(layout, data, strings), self._sm,
+                    session=self.__render_session(size),
+                    executor=self.__graph_executor)
+
+            images[profile.name] = profile.fit(generated[size])
+
+        return images
+
+    @timed("animation")
+    def save_animation(self,
+                       fp: typing.Union[str, typing.BinaryIO],
+                       days: int = 14,
+                       username: str = None,
+                       encoder: AnimationEncoder = None,
+                       ) -> int:
+        """ Saves an animation of the last `days` days into the given path or
+        file object: the background is colored by the R value of each day,
+        and the graphs grow by a day in each frame. The frames are encoded
+        one by one with the given encoder (`ANIMATION_ENCODER` by default).
+        Returns the number of frames. """
 
-        img_gen = ImageGenerator(Image.open(self.TEMPLATE_IMAGE_PATH))
-        img_gen.set_string_manager(self._sm)
+        if username is None:
+            username = self.instagram_username
 
-        img_gen.add_background(data.r_value)
-        img_gen.add_data(
-            data=[
+        if encoder is None:
+            encoder = self.ANIMATION_ENCODER
+
+        layout = self._get_layout(self.__layout_path)
+        data = self._get_country_data()
+        strings = self.__image_strings(data, username)
+
+        bindings = self.__layout_bindings(layout, data, strings)
+        if "background" in bindings:
+            bindings["background"] = data.r_values_each_day[-days:]
+
+        return encoder.save(
+            layout.compile().animate(bindings, string_manager=self._sm), fp)
+
+    @timed("strings")
+    def __image_strings(self, data: CountryData, username: str) -> dict:
+        """ Returns a dictionary with all of the strings that are drawn on
+        the image, so they are generated (and translated) only once, even if
+        the image is generated in multiple sizes. """
+
+        cases_days = len(data.new_cases_each_day[-self.STATS_OF_X_DAYS:])
+        r_value_days = len(data.r_values_each_day[-self.STATS_OF_X_DAYS:])
+
+        return {
+            "deaths": self._sm.deaths,
+            "active_cases": self._sm.active_cases,
+            "recovered": self._sm.recovered,
+            "new_cases": self._sm.new_cases,
+            "new_cases_number": self._sm.format_number(
+                data.new_cases,
+                leading_zeros=4
+            ),
+            "new_cases_graph_title": self._sm.new_cases_graph_title(
+                days=cases_days),
+            "basic_reproduction": self._sm.basic_reproduction,
+            "r_value_number": self._sm.format_number(
+                data.r_value, floating_max=2),
+            "r_graph_title": self._sm.r_graph_title(days=r_value_days),
+            "subtitle": self._sm.subtitle(username=username),
+        }
+
+    def __render_session(self, size: typing.Tuple[int, int]) -> RenderSession:
+        """ Returns the render session of the poster in the given size, so
+        the next render of this bot only renders again what changed. The
+        sessions are owned by the bot, and never shared with other bots. """
+
+        if size not in self.__render_sessions:
+            self.__render_sessions[size] = RenderSession()
+        return self.__render_sessions[size]
+
+    def __layout_bindings(self,
+                          layout: PosterLayout,
+                          data: CountryData,
+                          strings: dict,
+                          ) -> dict:
+        """ Returns the data of each slot in the layout. The bot knows the
+        slots of the default layout by their names (`background`, `data`,
+        `new_cases_title`, `new_cases_graph`, `r_value_title`,
+        `r_value_graph` and `subtitle`), so the slots of other layouts must
+        be named after them. """
+
+        bindings = self.__slot_bindings(data, strings)
+
+        unknown = [name for name in layout.slot_names if name not in bindings]
+        if unknown:
+            raise ValueError(
+                f"Unknown layout slots: {unknown} - the slots must be named "
+                f"one of {list(bindings)}")
+
+        return {name: bindings[name] for name in layout.slot_names}
+
+    def __slot_bindings(self, data: CountryData, strings: dict) -> dict:
+        """ Returns the data of each slot of the default layout, keyed by the
+        name of the slot. """
+
+        cases_data = data.new_cases_each_day[-self.STATS_OF_X_DAYS:]
+        r_value_data = data.r_values_each_day[-self.STATS_OF_X_DAYS:]
+
+        return {
+            "background": data.r_value,
+            "data": [
                 SingleDataPoster(
-                    self._sm.deaths,
+                    strings["deaths"],
                     now=data.deaths,
                     prev=data.deaths_yesterday,
                 ),
                 SingleDataPoster(
-                    self._sm.active_cases,
+                    strings["active_cases"],
                     now=data.active,
                     prev=data.active_yesterday,
                 ),
                 SingleDataPoster(
-                    self._sm.recovered,
+                    strings["recovered"],
                     now=data.recovered,
                     prev=data.recovered_yesterday,
                 ),
             ],
-            start_relative_y=0.07,
-            end_relative_y=0.19,
-        )
-
-        img_gen.add_poster_title(
-            PosterText([
-                self._sm.new_cases,
-                self._sm.format_number(
-                    data.new_cases,
-                    leading_zeros=4
-                ),
+            "new_cases_title": PosterText([
+                strings["new_cases"],
+                strings["new_cases_number"],
             ]),
-            y_relative=0.425,
-            side="l",
-            color=self.ACCENT_COLOR,
-        )
-
-        cases_data = data.new_cases_each_day[-self.STATS_OF_X_DAYS:]
-        img_gen.add_graph(
-            data=cases_data,
-            r_value=data.r_value,
-            relative_size=(0.475, 0.250),
-            relative_pos=(0.7, 0.45),
-            title=self._sm.new_cases_graph_title(
-                days=len(cases_data)),
-            title_color=self.SUBTITLES_COLOR,
-            accent_color=self.ACCENT_COLOR,
-        )
-
-        img_gen.add_poster_title(
-            PosterText([
-                self._sm.basic_reproduction,
-                self._sm.format_number(data.r_value, floating_max=2),
+            "new_cases_graph": {
+                "data": cases_data,
+                "r_value": data.r_value,
+                "title": strings["new_cases_graph_title"],
+            },
+            "r_value_title": PosterText([
+                strings["basic_reproduction"],
+                strings["r_value_number"],
             ]),
-            y_relative=0.725,
-            side="r",
-            color=self.ACCENT_COLOR,
-        )
-
-        r_value_data = data.r_values_each_day[-self.STATS_OF_X_DAYS:]
-        img_gen.add_graph_r_values(
-            data=r_value_data,
-            r_value=data.r_value,
-            guide_color=self.ACCENT_COLOR,
-            relative_size=(0.475, 0.250),
-            relative_pos=(0.3, 0.75),
-            title=self._sm.r_graph_title(days=len(r_value_data)),
-            title_color=self.SUBTITLES_COLOR,
-            accent_color=self.ACCENT_COLOR,
-        )
-
-        subtitle_string = self._sm.subtitle(username=username)
-        img_gen.add_subtitle(subtitle_string, color=self.SUBTITLES_COLOR)
-
-        return img_gen.image
+            "r_value_graph": {
+                "data": r_value_data,
+                "r_value": data.r_value,
+                "title": strings["r_graph_title"],
+            },
+            "subtitle": strings["subtitle"],
+        }
 
     def upload_image(self,
-                     img_path: str,
+                     img: typing.Union[str, bytes, typing.BinaryIO],
                      password: str,
                      username: str = None,
                      caption: str = None,
+                     extension: str = ".jpg",
                      ):
-        """ Recives a path to an image, and uploads the given image to the
-        Instagram account saved in the login info file.
+        """ Recives an image - a path to an image file, the encoded image bytes
+        or a file object with the encoded image - and uploads the given image
+        to the Instagram account saved in the login info file.
+
+        The Instagram library can only upload images from a path, so bytes and
+        file objects are written to a private temporary folder (with the
+        given `extension`) that is removed right after the upload.
         """
 
         if username is None:
             username = self.instagram_username
 
+        # Imported only when an image is really uploaded, because instabot
+        # is slow to import
+        from instabot import Bot as Instabot
+
         bot = Instabot()
         bot.login(username=username, password=password)
-        bot.upload_photo(img_path, caption=caption,
-                         options={"rename": False})
+
+        if isinstance(img, str):
+            bot.upload_photo(img, caption=caption,
+                             options={"rename": False})
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            img_path = os.path.join(temp_dir, "image" + extension)
+
+            with open(img_path, 'wb') as f:
+                if isinstance(img, bytes):
+                    f.write(img)
+                else:
+                    shutil.copyfileobj(img, f)
+
+            bot.upload_photo(img_path, caption=caption,
+                             options={"rename": False})
 
     def generate_and_upload(self,
                             password: str,
                             username: str = None,
-                            temp_image_name: str = "tempimg.jpg",
+                            encoder: ImageEncoder = None,
                             ):
         """ Generate a new image, and upload it to Instagram. """
 
         if username is None:
             username = self.instagram_username
 
-        # Generate and save the covid image.
-        img = self.to_image(username=username).convert("RGB")
-        img.save(temp_image_name)
+        img = self.to_image(username=username)
+        self.upload_generated_image(
+            img,
+            password=password,
+            username=username,
+            encoder=encoder,
+        )
 
-        # Upload the image to instagram
-        caption = self.get_caption()
-        self.upload_image(img_path=temp_image_name, caption=caption,
-                          username=username, password=password)
+    def upload_generated_image(self,
+                               img: Image.Image,
+                               password: str,
+                               username: str = None,
+                               encoder: ImageEncoder = None,
+                               ):
+        """ Uploads an image that was already generated (using `to_image` or
+        `render_all`) to Instagram, with the matching caption. The image is
+        encoded in memory using the given encoder (`UPLOAD_ENCODER` by
+        default). """
+
+        if username is None:
+            username = self.instagram_username
+
+        if encoder is None:
+            encoder = self.UPLOAD_ENCODER
 
-        os.remove(temp_image_name)
+        # Encode the covid image, and upload it to instagram
+        caption = self.get_caption()
+        self.upload_image(encoder.encode(img), caption=caption,
+                          username=username, password=password,
+                          extension=encoder.extension)
 
     def get_caption(self,):
         country_code = self._country.code.upper()
@@ -251,6 +428,10 @@ class CountryConfig:
             assert isinstance(
                 instagram_data["password"], str), "Instagram password must be a string"
 
+        if "layout" in data:
+            assert isinstance(
+                data["layout"], str), "Layout must be a path to a layout file"
+
         if "translations" in data:
             translations_data = data["translations"]
 
@@ -272,17 +453,24 @@ class CountryConfig:
         )
         return sm
 
-    def to_bot(self,) -> CovidStatsInstagramBot:
+    def to_bot(self, country_data: CountryData = None,) -> CovidStatsInstagramBot:
         return CovidStatsInstagramBot(
             country_code=self.country.code,
             username=self.instagram_login[0],
             string_manager=self.to_string_manager(),
+            country_data=country_data,
+            layout_path=self.layout_path,
         )
 
     @property
     def country(self,):
         return self.__country
 
+    @property
+    def data(self,) -> dict:
+        """ The raw config data of the country, as loaded from the file. """
+        return self.__data
+
     @property
     def instagram_login(self,):
         if "instagram" not in self.__data:
@@ -291,6 +479,12 @@ class CountryConfig:
         instagram_data = self.__data["instagram"]
         return instagram_data["username"], instagram_data["password"]
 
+    @property
+    def layout_path(self,):
+        """ The path to the layout file of the country, or `None` to use the
+        default layout. """
+        return self.__data.get("layout")
+
     @property
     def translations(self,):
         if "translations" not in self.__data:
@@ -299,12 +493,148 @@ class CountryConfig:
         return self.__data["translations"]
 
 
-def main():
+def _init_render_worker(graph_cache_path: str = None,
+                        translation_cache_path: str = None,
+                        ) -> None:
+    """ Initializes a worker process of `render_all`: graphs rendered and
+    strings translated by the worker are cached in its memory, and in the
+    given folder and file (if given) - which are shared by all of the
+    workers. """
+
+    GraphGenerator.set_render_cache(GraphRenderCache(path=graph_cache_path))
+    StringManager.set_translation_cache(
+        TranslationCache(path=translation_cache_path))
+
+
+def _render_country_config(country_code: str,
+                           config_data: dict,
+                           country_rows: typing.List[dict],
+                           instrument: bool = False,
+                           trace_allocations: bool = False,
+                           ) -> typing.Tuple[int, float, Image.Image, typing.Optional[dict]]:
+    """ Generates the image of a single country config. Called inside of the
+    worker processes of `render_all`, and returns the id of the worker
+    process, the time it took to generate the image, the image itself and
+    the stats of each stage (`None` if `instrument` is `False`). """
+
+    start_time = time.perf_counter()
+
+    config = CountryConfig(Country(country_code), config_data)
+    bot = config.to_bot(country_data=CountryData(country_rows))
+
+    if not instrument:
+        img = bot.to_image()
+        return os.getpid(), time.perf_counter() - start_time, img, None
+
+    report = StageReport()
+    with instrumented(report, trace_allocations=trace_allocations):
+        img = bot.to_image()
+
+    return os.getpid(), time.perf_counter() - start_time, img, report.stats
+
+
+def render_all(configs: typing.Iterable[CountryConfig],
+               workers: int = None,
+               report_path: str = None,
+               trace_allocations: bool = False,
+               graph_cache_path: str = None,
+               translation_cache_path: str = None,
+               ) -> typing.Iterator[typing.Tuple[CountryConfig, Image.Image]]:
+    """ Generates the images of all of the given country configs, using a pool
+    of `workers` processes (`None` = the number of processors on the machine).
+
+    The covid data is downloaded only once, and each worker receives only
+    the data of the country it generates. Yields `(config, image)` tuples in
+    the order in which the images are finished, and logs the throughput of
+    each worker when done. Countries whose image fails to generate are logged
+    and skipped, without stopping the rest of the batch.
+
+    If `report_path` is given, the time spent in each stage of the image
+    generation is measured, aggregated across the whole batch and written
+    to the given path. See the `instrumentation` module.
+
+    Identical graphs (like the graphs of a country that is posted by a few
+    accounts) are rendered only once by each worker. If `graph_cache_path`
+    is given, the rendered graphs are also saved in this folder, and are
+    shared between the workers and the runs. See `GraphRenderCache`.
+
+    In the same way, each string is translated only once by each worker, and
+    if `translation_cache_path` is given, the translations are also saved in
+    this file. See `TranslationCache`. """
+
+    api = CovidHistoryDatabase()
+    worker_stats = dict()
+    instrument = report_path is not None
+    report = StageReport()
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_render_worker,
+                             initargs=(graph_cache_path,
+                                       translation_cache_path)) as executor:
+        futures = {
+            executor.submit(
+                _render_country_config,
+                config.country.code,
+                config.data,
+                api.country_data(config.country.name),
+                instrument,
+                trace_allocations,
+            ): config
+            for config in configs
+        }
+
+        for future in as_completed(futures):
+            config = futures[future]
+
+            try:
+                pid, seconds, img, stages_stats = future.result()
+            except Exception:
+                # A single country must not stop the rest of the batch
+                logger.exception("%s - Failed to generate the image",
+                                 config.country.name)
+                continue
+
+            if stages_stats is not None:
+                report.merge(stages_stats)
+
+            images_count, total_seconds = worker_stats.get(pid, (0, 0))
+            worker_stats[pid] = (images_count + 1, total_seconds + seconds)
+
+            yield config, img
+
+    for pid, (images_count, total_seconds) in worker_stats.items():
+        logger.info(
+            "Worker %d - Generated %d images in %.2f seconds (%.2f images per second)",
+            pid,
+            images_count,
+            total_seconds,
+            images_count / total_seconds,
+        )
+
+    if instrument:
+        report.write(report_path)
+
+
+def main(workers: int = None,
+         report_path: str = None,
+         graph_cache_path: str = None,
+         translation_cache_path: str = None,
+         ):
+
+    # The captions are translated in this process
+    StringManager.set_translation_cache(
+        TranslationCache(path=translation_cache_path))
+
+    images = render_all(ConfigFile('config.json'),
+                        workers=workers, report_path=report_path,
+                        graph_cache_path=graph_cache_path,
+                        translation_cache_path=translation_cache_path)
 
-    for country_config in ConfigFile('config.json'):
+    for country_config, img in images:
 
         username, password = country_config.instagram_login
-        country_config.to_bot().generate_and_upload(
+        country_config.to_bot().upload_generated_image(
+            img,
             username=username,
             password=password
         )
@@ -1,27 +1,168 @@
 # Built in modules
 from bidi.algorithm import get_display
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Iterable, Iterator, Union, BinaryIO
+import io
+import itertools
 import math
 import os
-import random
+import shutil
+import subprocess
+import tempfile
 import logging
 
 # Pillow
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-
-# Mathplotlib
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import matplotlib.font_manager as font_manager
-import pylab
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageOps, GifImagePlugin
 
 # My code
 from translator import StringManager, StringManagerDependent
-from grapher import GraphGenerator
+from grapher import GraphGenerator, GRAPH_BACKENDS
+from instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
 
+class GlyphAtlas:
+    """
+    A cache of the rendered glyphs of numeric characters (digits, signs and
+    separators) in a single font. Numeric strings are drawn by composing the
+    cached glyph masks using the advances and the kerning of the font,
+    instead of rasterizing each digit again, and the result is identical to
+    drawing the string with `ImageDraw.text`.
+
+    Strings that contain other characters (or that can't be composed exactly,
+    for example because of fractional advances) are drawn using
+    `ImageDraw.text`. Use the `for_font` class method to get the shared atlas
+    of a font.
+    """
+
+    # Digits, signs and the separators used by the supported languages
+    # (including non-breaking spaces and the unicode minus sign)
+    CHARACTERS = frozenset("0123456789+-%.,' \u00a0\u202f\u2212")
+
+    # Atlases, keyed by the path and the size of the font.
+    # See the `for_font` method for more information!
+    __atlases = dict()
+
+    def __init__(self, font: ImageFont.FreeTypeFont):
+        self.__font = font
+        self.__glyphs = dict()
+        self.__kerning = dict()
+
+    @classmethod
+    def for_font(cls, font: ImageFont.FreeTypeFont) -> 'GlyphAtlas':
+        """ Returns the atlas of the given font. Each font (path and size) has
+        only one atlas. """
+
+        key = (font.path, font.size)
+        if key not in cls.__atlases:
+            cls.__atlases[key] = cls(font)
+        return cls.__atlases[key]
+
+    @property
+    def font(self,) -> ImageFont.FreeTypeFont:
+        return self.__font
+
+    def supports(self, text: str) -> bool:
+        """ Returns `True` if all of the characters in the given text are
+        cached in the atlas. """
+        return bool(text) and self.CHARACTERS.issuperset(text)
+
+    def __glyph(self, char: str) -> Tuple[Image.Image, Tuple[int, int], float]:
+        """ Returns the mask of the given character, its offset from the pen
+        position on the baseline, and its advance. Each glyph is rendered
+        only once. """
+
+        if char not in self.__glyphs:
+            left, top, right, bottom = self.font.getbbox(char, anchor="ls")
+            mask = Image.new("L", (max(right - left, 0), max(bottom - top, 0)))
+            if mask.width and mask.height:
+                ImageDraw.Draw(mask).text((-left, -top), char, fill=255,
+                                          font=self.font, anchor="ls")
+
+            self.__glyphs[char] = (mask, (left, top), self.font.getlength(char))
+
+        return self.__glyphs[char]
+
+    def __kerning_of(self, pair: str) -> float:
+        """ Returns the kerning between the two characters of the given pair. """
+
+        if pair not in self.__kerning:
+            self.__kerning[pair] = self.font.getlength(pair) - \
+                self.__glyph(pair[0])[2] - self.__glyph(pair[1])[2]
+        return self.__kerning[pair]
+
+    def text_mask(self,
+                  text: str,
+                  anchor: str = None,
+                  ) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """ Composes the mask of the given text from the cached glyphs, and
+        returns it together with its offset from the anchor - like the
+        `getmask2` method of the font. Returns `None` if the text can't be
+        composed exactly. """
+
+        if not self.supports(text):
+            return None
+
+        glyphs = list()
+        pen = 0
+        for index, char in enumerate(text):
+            if index > 0:
+                pen += self.__kerning_of(text[index - 1:index + 1])
+
+            if pen != int(pen):
+                # Fractional positions are rendered differently by FreeType
+                return None
+
+            mask, (left, top), advance = self.__glyph(char)
+            if mask.width and mask.height:
+                glyphs.append((mask, int(pen) + left, top))
+            pen += advance
+
+        if not glyphs:
+            return None
+
+        left = min(x for _, x, _ in glyphs)
+        top = min(y for _, _, y in glyphs)
+        right = max(x + mask.width for mask, x, _ in glyphs)
+        bottom = max(y + mask.height for mask, _, y in glyphs)
+
+        text_mask = Image.new("L", (right - left, bottom - top))
+        for mask, x, y in glyphs:
+            box = (x - left, y - top, x - left + mask.width, y - top + mask.height)
+            # Overlapping glyphs are merged like FreeType does - the
+            # lighter pixel wins.
+            text_mask.paste(ImageChops.lighter(text_mask.crop(box), mask), box)
+
+        # Move from the "ls" (left-baseline) anchor to the given one
+        anchor_left, anchor_top, _, _ = self.font.getbbox(text, anchor=anchor)
+        ls_left, ls_top, _, _ = self.font.getbbox(text, anchor="ls")
+
+        offset = (left + anchor_left - ls_left, top + anchor_top - ls_top)
+        return text_mask, offset
+
+    def draw_text(self,
+                  img: Image.Image,
+                  xy: Tuple[int, int],
+                  text: str,
+                  fill="black",
+                  anchor: str = None,
+                  ) -> None:
+        """ Draws the given text on the given image, exactly like
+        `ImageDraw.Draw(img).text(xy, text, fill=fill, font=font, anchor=anchor)`. """
+
+        composed = None
+        if all(isinstance(cur, int) for cur in xy):
+            composed = self.text_mask(text, anchor=anchor)
+
+        if composed is None:
+            ImageDraw.Draw(img).text(xy, text, fill=fill,
+                                     font=self.font, anchor=anchor)
+            return
+
+        mask, offset = composed
+        img.paste(fill, box=(xy[0] + offset[0], xy[1] + offset[1]), mask=mask)
+
+
 class PosterText(StringManagerDependent):
     """
     Represents a collection of words, sencenses, or lines. Has a method called
@@ -61,6 +202,12 @@ class PosterText(StringManagerDependent):
 
         return [get_display(line) for line in lines]
 
+    @property
+    def fingerprint(self,) -> tuple:
+        """ Identifies the content of the poster. Posters with the same
+        fingerprint generate the same image. """
+        return tuple(self._lines)
+
     def set_truetype_font(self, *args, **kwargs):
         """ Saves the argument and keyword arguments that are passed, and uses
         them when generating the font of the poster image. """
@@ -148,7 +295,7 @@ class PosterText(StringManagerDependent):
             width=width,
             padding=padding,
             color=color,
-            left_lines=self._lines,
+            left_lines=list(self._lines),
             cur_height=0,
         )
 
@@ -181,17 +328,24 @@ class PosterText(StringManagerDependent):
             left_lines=left_lines,
             cur_height=cur_height + height,
         )
-        draw = ImageDraw.Draw(image)
-        draw.text((0, cur_height), line, fill=color, font=font)
+        GlyphAtlas.for_font(font).draw_text(
+            image, (0, cur_height), line, fill=color)
         return image
 
 
 class SingleDataPoster(StringManagerDependent):
 
     ASSETS_PATH = os.path.join("assets", "icons")
-    NO_CHANGE_ICON = Image.open(os.path.join(ASSETS_PATH, "no-change.png"))
-    ARROW_UP_ICON = Image.open(os.path.join(ASSETS_PATH, "arrow-up.png"))
-    ARROW_DOWN_ICON = ImageOps.flip(ARROW_UP_ICON)
+    ICONS_PATHS = {
+        # The arrow down icon is the arrow up icon, flipped.
+        # See the `_get_icon` method for more information!
+        "no-change": os.path.join(ASSETS_PATH, "no-change.png"),
+        "arrow-up": os.path.join(ASSETS_PATH, "arrow-up.png"),
+    }
+
+    # Tinted and resized icons, keyed by (kind, color, size).
+    # See the `_get_icon` method for more information!
+    __icons_cache = dict()
 
     def __init__(self,
                  title: str,
@@ -209,6 +363,12 @@ class SingleDataPoster(StringManagerDependent):
     def title(self,) -> str:
         return self._title
 
+    @property
+    def fingerprint(self,) -> tuple:
+        """ Identifies the content of the poster. Posters with the same
+        fingerprint (and string manager) generate the same image. """
+        return (self.title, self.now, self.prev)
+
     @property
     def now(self,) -> int:
         return self._now
@@ -255,6 +415,21 @@ class SingleDataPoster(StringManagerDependent):
         string = self._string_manager.format_number(num, floating_max=2)
         return f'{string}%'
 
+    def layout(self,
+               data_font: ImageFont.ImageFont,
+               title_font: ImageFont.ImageFont = None,
+               alter_font: ImageFont.ImageFont = None,
+               ) -> 'SingleDataPosterLayout':
+        """ Returns a new layout object, that formats and measures the strings
+        of this poster once using the given fonts. """
+
+        return SingleDataPosterLayout(
+            poster=self,
+            data_font=data_font,
+            title_font=title_font,
+            alter_font=alter_font,
+        )
+
     def to_image(self,
                  data_font: ImageFont.ImageFont,
                  title_font: ImageFont.ImageFont = None,
@@ -274,29 +449,21 @@ class SingleDataPoster(StringManagerDependent):
                  pad_icon: int = 0,  # padding between icon and alter text
                  ):
 
-        if title_font is None:
-            title_font = data_font
-        if alter_font is None:
-            alter_font = data_font
-
-        if width is None:
-            width = self.__calc_image_width(
-                data_font=data_font,
-                title_font=title_font,
-                alter_font=alter_font,
-                draw_line=draw_line,
-                line_length=line_length,
-                icon_size=icon_size,
-                pad_icon=pad_icon,
-            )
-
-        height = self.__calc_image_height(
+        layout = self.layout(
             data_font=data_font,
             title_font=title_font,
             alter_font=alter_font,
+        )
+
+        width, height = self.__calc_image_size(
+            layout=layout,
+            width=width,
             pad_title=pad_title,
             pad_data=pad_data,
+            draw_line=draw_line,
+            line_length=line_length,
             icon_size=icon_size,
+            pad_icon=pad_icon,
         )
 
         # Create the image
@@ -307,15 +474,15 @@ class SingleDataPoster(StringManagerDependent):
         x, y = int(width/2), 0
 
         # Add title to image
-        draw.text((x, y), get_display(self.title),
-                  font=title_font, fill=color, anchor="ma")
-        y += title_font.getsize(self.title)[1]
+        draw.text((x, y), get_display(layout.title),
+                  font=layout.title_font, fill=color, anchor="ma")
+        y += layout.title_size[1]
         y += pad_title
 
         # Add data to image
-        draw.text((x, y), self.now_str, font=data_font,
-                  fill=color, anchor="ma")
-        y += data_font.getsize(self.now_str)[1]
+        GlyphAtlas.for_font(layout.data_font).draw_text(
+            image, (x, y), layout.now_str, fill=color, anchor="ma")
+        y += layout.now_size[1]
         y += int(pad_data / 2)
 
         # Add line to image, if needed
@@ -333,25 +500,89 @@ class SingleDataPoster(StringManagerDependent):
 
         # Add alter data to image
         alter_img = self.alter_image(
-            font=alter_font, color=color, icon_size=icon_size, pad_icon=pad_icon)
+            font=layout.alter_font, color=color, icon_size=icon_size,
+            pad_icon=pad_icon, layout=layout)
         x = int((width - alter_img.width) / 2)
         image.paste(alter_img, box=(x, y))
 
         return image
 
+    def calc_image_size(self,
+                        data_font: ImageFont.ImageFont,
+                        title_font: ImageFont.ImageFont = None,
+                        alter_font: ImageFont.ImageFont = None,
+
+                        width=None,  # None = calculate automatically
+
+                        pad_title: int = 0,
+                        pad_data: int = 0,
+
+                        draw_line: bool = True,
+                        line_length: int = None,  # None = max width.
+
+                        icon_size: int = None,  # None = do not resize
+                        pad_icon: int = 0,  # padding between icon and alter text
+                        ) -> Tuple[int, int]:
+        """ Returns the size (width, height) of the image that the `to_image`
+        method generates with the given arguments, without drawing it. """
+
+        layout = self.layout(
+            data_font=data_font,
+            title_font=title_font,
+            alter_font=alter_font,
+        )
+
+        return self.__calc_image_size(
+            layout=layout,
+            width=width,
+            pad_title=pad_title,
+            pad_data=pad_data,
+            draw_line=draw_line,
+            line_length=line_length,
+            icon_size=icon_size,
+            pad_icon=pad_icon,
+        )
+
+    def __calc_image_size(self,
+                          layout: 'SingleDataPosterLayout',
+                          width: Optional[int],
+                          pad_title: int,
+                          pad_data: int,
+                          draw_line: bool,
+                          line_length: Optional[int],
+                          icon_size: Optional[int],
+                          pad_icon: int,
+                          ) -> Tuple[int, int]:
+
+        if width is None:
+            width = self.__calc_image_width(
+                layout=layout,
+                draw_line=draw_line,
+                line_length=line_length,
+                icon_size=icon_size,
+                pad_icon=pad_icon,
+            )
+
+        height = self.__calc_image_height(
+            layout=layout,
+            pad_title=pad_title,
+            pad_data=pad_data,
+            icon_size=icon_size,
+        )
+
+        return width, height
+
     def __calc_image_height(self,
-                            data_font: ImageFont.ImageFont,
-                            title_font: ImageFont.ImageFont,
-                            alter_font: ImageFont.ImageFont,
+                            layout: 'SingleDataPosterLayout',
                             pad_title: int,
                             pad_data: int,
                             icon_size: Optional[int]):
         alter_height = self.__calc_alter_height(
-            font=alter_font, icon_size=icon_size
+            layout=layout, icon_size=icon_size
         )
 
-        data_height = data_font.getsize(self.now_str)[1]
-        title_height = title_font.getsize(self.title)[1]
+        data_height = layout.now_size[1]
+        title_height = layout.title_size[1]
 
         return math.ceil(sum([
             alter_height,
@@ -366,16 +597,20 @@ class SingleDataPoster(StringManagerDependent):
                     color="black",
                     icon_size: int = None,  # None = do not resize
                     pad_icon: int = 0,  # padding between icon and alter text
+                    layout: 'SingleDataPosterLayout' = None,
                     ):
 
+        layout = self.__alter_layout(font, layout)
+
         if self.delta == 0:
-            return self.alter_text(self._string_manager.unchanged, font=font, color=color,)
+            return self.alter_text(layout.unchanged, font=font, color=color,)
 
         elif self.delta_precentage is None:
-            return self.alter_text(self._string_manager.unavailable, font=font, color=color,)
+            return self.alter_text(layout.unavailable, font=font, color=color,)
 
         else:
-            return self.alter_stats_image(font=font, color=color, icon_size=icon_size, pad_icon=pad_icon)
+            return self.alter_stats_image(font=font, color=color, icon_size=icon_size,
+                                          pad_icon=pad_icon, layout=layout)
 
     def alter_text(self,
                    text: str,
@@ -385,8 +620,8 @@ class SingleDataPoster(StringManagerDependent):
 
         text = get_display(text)
 
-        size = font.getsize(text)
-        img = Image.new("RGBA", size, color=(255, 255, 255, 0))
+        _, _, width, height = font.getbbox(text)
+        img = Image.new("RGBA", (width, height), color=(255, 255, 255, 0))
 
         draw = ImageDraw.Draw(img)
         draw.text((0, 0), text, fill=color, font=font)
@@ -398,49 +633,93 @@ class SingleDataPoster(StringManagerDependent):
                           color="black",
                           icon_size: int = None,  # None = do not resize
                           pad_icon: int = 0,  # padding between icon and alter text
+                          layout: 'SingleDataPosterLayout' = None,
                           ):
 
-        size = (self.__calc_alter_width(font=font, icon_size=icon_size, pad_icon=pad_icon),
-                self.__calc_alter_height(font=font, icon_size=icon_size))
+        layout = self.__alter_layout(font, layout)
+
+        size = (self.__calc_alter_width(layout=layout, icon_size=icon_size, pad_icon=pad_icon),
+                self.__calc_alter_height(layout=layout, icon_size=icon_size))
 
         image = Image.new("RGBA", color=(255, 255, 255, 0), size=size)
 
         # Load the icon
-        icon = self.__get_matching_icon(color=color)
-        if icon_size is not None:
-            # Resize if needed
-            if isinstance(icon_size, int):
-                icon_size = (icon_size, icon_size)
-            icon = icon.resize(icon_size)
+        icon = self.__get_matching_icon(color=color, icon_size=icon_size)
 
         # Paste icon
-        x = int(font.getsize(self.delta_str)[0] + pad_icon)
+        x = int(layout.delta_size[0] + pad_icon)
         y = int((image.height - icon.height) / 2)
         image.paste(icon, box=(x, y))
 
-        # Generate draw object
-        draw = ImageDraw.Draw(image)
+        # Numbers are drawn using the glyphs atlas of the font
+        atlas = GlyphAtlas.for_font(layout.alter_font)
 
         # Paste left text
         x = 0
         y = int(image.height / 2)
-        draw.text((x, y), self.delta_str,
-                  fill=color, font=font, anchor="lm")
+        atlas.draw_text(image, (x, y), layout.delta_str,
+                        fill=color, anchor="lm")
 
         # Paste right text
         x = image.width
-        draw.text((x, y), self.delta_precentage_str,
-                  fill=color, font=font, anchor="rm")
+        atlas.draw_text(image, (x, y), layout.delta_precentage_str,
+                        fill=color, anchor="rm")
 
         return image
 
-    def __get_matching_icon(self, color=None,) -> Image.Image:
+    def __alter_layout(self,
+                       font: ImageFont.ImageFont,
+                       layout: Optional['SingleDataPosterLayout'],
+                       ) -> 'SingleDataPosterLayout':
+        """ Returns the given layout if it measures the alter text with the
+        given font, and a new layout that does otherwise - so the alter text
+        is always measured with the font it is drawn with. """
+
+        if layout is None or layout.alter_font is not font:
+            layout = self.layout(data_font=font)
+
+        return layout
+
+    def __get_matching_icon(self, color=None, icon_size=None,) -> Image.Image:
         if self.delta == 0:
-            icon = self.NO_CHANGE_ICON.copy()
+            kind = "no-change"
         elif self.delta > 0:
-            icon = self.ARROW_UP_ICON.copy()
+            kind = "arrow-up"
+        else:
+            kind = "arrow-down"
+
+        return self._get_icon(kind, color=color, size=icon_size)
+
+    @classmethod
+    def _get_icon(cls,
+                  kind: str,
+                  color=None,  # None = do not color
+                  size=None,  # None = do not resize
+                  ) -> Image.Image:
+        """ Returns the icon of the given kind (`no-change`, `arrow-up` or
+        `arrow-down`), colored and resized. Each icon is generated only once
+        and then saved in the cache, so the returned image is shared and
+        should not be modified! The icons files are loaded only when they
+        are first needed. """
+
+        if isinstance(size, int):
+            size = (size, size)
+
+        key = (kind, color, size)
+        if key in cls.__icons_cache:
+            return cls.__icons_cache[key]
+
+        if color is not None or size is not None:
+            icon = cls._get_icon(kind)
+        elif kind == "arrow-down":
+            icon = ImageOps.flip(cls._get_icon("arrow-up"))
         else:
-            icon = self.ARROW_DOWN_ICON.copy()
+            icon = Image.open(cls.ICONS_PATHS[kind])
+            icon.load()
+
+        # Resize if needed
+        if size is not None:
+            icon = icon.resize(size)
 
         # Add color to the icon
         if color is not None:
@@ -448,47 +727,45 @@ class SingleDataPoster(StringManagerDependent):
             color_img.putalpha(icon.getchannel('A'))
             icon = color_img
 
+        cls.__icons_cache[key] = icon
         return icon
 
     def __calc_alter_width(self,
-                           font: ImageFont.ImageFont,
+                           layout: 'SingleDataPosterLayout',
                            icon_size: int,  # None = do not resize
                            pad_icon: int,  # padding between icon and alter text
                            ) -> int:
         if icon_size is None:
-            icon_size = self.ARROW_UP_ICON.width
+            icon_size = self._get_icon("arrow-up").width
 
         alter_width = icon_size
         alter_width += pad_icon * 2
-        alter_width += font.getsize(self.delta_str)[0] + \
-            font.getsize(self.delta_precentage_str)[0]
+        alter_width += layout.delta_size[0] + layout.delta_precentage_size[0]
 
         return math.ceil(alter_width)
 
-    def __calc_alter_height(self, font: ImageFont.ImageFont, icon_size: int) -> int:
+    def __calc_alter_height(self, layout: 'SingleDataPosterLayout', icon_size: int) -> int:
         if icon_size is None:
             icon_size = self.__get_matching_icon().height
 
         return math.ceil(max(
             icon_size,
-            font.getsize(self.delta_str)[1],
-            font.getsize(self.delta_precentage_str)[1],
+            layout.delta_size[1],
+            layout.delta_precentage_size[1],
         ))
 
     def __calc_image_width(self,
-                           data_font: ImageFont.ImageFont,
-                           title_font: ImageFont.ImageFont,
-                           alter_font: ImageFont.ImageFont,
+                           layout: 'SingleDataPosterLayout',
                            draw_line: bool,
                            line_length: Optional[int],
                            icon_size: Optional[int],
                            pad_icon: int,
                            ) -> int:
 
-        data_width = data_font.getsize(self.now_str)[0]
-        title_width = title_font.getsize(self.title)[0]
+        data_width = layout.now_size[0]
+        title_width = layout.title_size[0]
         alter_width = self.__calc_alter_width(
-            font=alter_font, icon_size=icon_size, pad_icon=pad_icon)
+            layout=layout, icon_size=icon_size, pad_icon=pad_icon)
 
         if line_length is None:
             line_length = 0
@@ -501,6 +778,427 @@ class SingleDataPoster(StringManagerDependent):
         ]))
 
 
+class SingleDataPosterLayout:
+    """
+    Formats and measures the strings of a single `SingleDataPoster`, using the
+    given fonts. Each string is formatted and measured only once, and the
+    results are saved in the instance - so calculating the size of the poster
+    and drawing it does not require formatting or measuring the same strings
+    over and over again.
+    """
+
+    def __init__(self,
+                 poster: SingleDataPoster,
+                 data_font: ImageFont.ImageFont,
+                 title_font: ImageFont.ImageFont = None,
+                 alter_font: ImageFont.ImageFont = None,
+                 ):
+
+        if title_font is None:
+            title_font = data_font
+        if alter_font is None:
+            alter_font = data_font
+
+        self.__poster = poster
+        self.__data_font = data_font
+        self.__title_font = title_font
+        self.__alter_font = alter_font
+
+        self.__strings = dict()
+        self.__sizes = dict()
+
+    def __string(self, key: str, generate) -> str:
+        """ Returns the string saved with the given key. If the string is not
+        saved yet, generates it using the given function and saves it. """
+
+        if key not in self.__strings:
+            self.__strings[key] = generate()
+        return self.__strings[key]
+
+    def text_size(self, font: ImageFont.ImageFont, text: str) -> Tuple[int, int]:
+        """ Returns the size of the given text with the given font. Each
+        (font, text) pair is measured only once. """
+
+        key = (font, text)
+        if key not in self.__sizes:
+            _, _, width, height = font.getbbox(text)
+            self.__sizes[key] = (width, height)
+        return self.__sizes[key]
+
+    @property
+    def data_font(self,) -> ImageFont.ImageFont:
+        return self.__data_font
+
+    @property
+    def title_font(self,) -> ImageFont.ImageFont:
+        return self.__title_font
+
+    @property
+    def alter_font(self,) -> ImageFont.ImageFont:
+        return self.__alter_font
+
+    @property
+    def title(self,) -> str:
+        return self.__poster.title
+
+    @property
+    def now_str(self,) -> str:
+        return self.__string("now", lambda: self.__poster.now_str)
+
+    @property
+    def delta_str(self,) -> str:
+        return self.__string("delta", lambda: self.__poster.delta_str)
+
+    @property
+    def delta_precentage_str(self,) -> str:
+        return self.__string(
+            "delta_precentage", lambda: self.__poster.delta_precentage_str)
+
+    @property
+    def unchanged(self,) -> str:
+        return self.__string(
+            "unchanged", lambda: self.__poster._string_manager.unchanged)
+
+    @property
+    def unavailable(self,) -> str:
+        return self.__string(
+            "unavailable", lambda: self.__poster._string_manager.unavailable)
+
+    @property
+    def title_size(self,) -> Tuple[int, int]:
+        return self.text_size(self.title_font, self.title)
+
+    @property
+    def now_size(self,) -> Tuple[int, int]:
+        return self.text_size(self.data_font, self.now_str)
+
+    @property
+    def delta_size(self,) -> Tuple[int, int]:
+        return self.text_size(self.alter_font, self.delta_str)
+
+    @property
+    def delta_precentage_size(self,) -> Tuple[int, int]:
+        return self.text_size(self.alter_font, self.delta_precentage_str)
+
+
+class ImageEncoder:
+    """
+    Encodes images into bytes in memory, without writing them to the disk.
+    Supports the `JPEG`, `WEBP` and `PNG` formats. The `quality` is used by
+    the JPEG and WebP formats, `progressive` is used by JPEG only, and
+    `optimize` by JPEG and PNG.
+    """
+
+    # The image mode that each format is encoded from
+    FORMAT_MODES = {
+        "JPEG": "RGB",
+        "WEBP": "RGBA",
+        "PNG": "RGBA",
+    }
+
+    FORMAT_EXTENSIONS = {
+        "JPEG": ".jpg",
+        "WEBP": ".webp",
+        "PNG": ".png",
+    }
+
+    def __init__(self,
+                 format: str = "JPEG",
+                 quality: int = 90,
+                 progressive: bool = True,
+                 optimize: bool = True,
+                 ):
+        format = format.upper()
+        if format not in self.FORMAT_MODES:
+            raise ValueError(
+                f"Image format must be one of {list(self.FORMAT_MODES)}.")
+
+        self.__format = format
+        self.__quality = quality
+        self.__progressive = progressive
+        self.__optimize = optimize
+
+    @property
+    def format(self,) -> str:
+        return self.__format
+
+    @property
+    def extension(self,) -> str:
+        """ The file extension that matches the format (for example `.jpg`). """
+        return self.FORMAT_EXTENSIONS[self.format]
+
+    def __save_kwargs(self,) -> dict:
+        if self.format == "JPEG":
+            return {
+                "quality": self.__quality,
+                "progressive": self.__progressive,
+                "optimize": self.__optimize,
+            }
+
+        if self.format == "WEBP":
+            return {"quality": self.__quality}
+
+        return {"optimize": self.__optimize}
+
+    def to_buffer(self, img: Image.Image) -> io.BytesIO:
+        """ Returns a buffer that contains the encoded image, positioned at
+        the start of the buffer. """
+
+        mode = self.FORMAT_MODES[self.format]
+        if img.mode != mode:
+            img = img.convert(mode)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=self.format, **self.__save_kwargs())
+        buffer.seek(0)
+
+        return buffer
+
+    def encode(self, img: Image.Image) -> bytes:
+        """ Returns the encoded image as bytes. """
+        return self.to_buffer(img).getvalue()
+
+
+class AnimationEncoder:
+    """
+    Encodes a stream of frames into an animation. Each frame is encoded as
+    soon as it is generated, so the frames are never kept in memory together.
+    Supports the `GIF` format (with Pillow), and the `MP4` format (with the
+    `ffmpeg` executable, that has to be installed).
+    """
+
+    FORMAT_EXTENSIONS = {
+        "GIF": ".gif",
+        "MP4": ".mp4",
+    }
+
+    def __init__(self,
+                 format: str = "GIF",
+                 fps: float = 10,
+                 loop: int = 0,
+                 ):
+        format = format.upper()
+        if format not in self.FORMAT_EXTENSIONS:
+            raise ValueError(
+                f"Animation format must be one of {list(self.FORMAT_EXTENSIONS)}.")
+
+        if not fps > 0:
+            raise ValueError("The frame rate must be positive.")
+
+        self.__format = format
+        self.__fps = fps
+        self.__loop = loop
+
+    @property
+    def format(self,) -> str:
+        return self.__format
+
+    @property
+    def extension(self,) -> str:
+        """ The file extension that matches the format (for example `.gif`). """
+        return self.FORMAT_EXTENSIONS[self.format]
+
+    @property
+    def fps(self,) -> float:
+        return self.__fps
+
+    def save(self,
+             frames: Iterable[Image.Image],
+             fp: Union[str, BinaryIO],
+             ) -> int:
+        """ Encodes the given frames (all in the same size) into the given
+        path or binary file object, and returns the number of frames. """
+
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("An animation must have at least one frame.")
+
+        if isinstance(fp, str):
+            with open(fp, 'wb') as f:
+                return self.__save(first, frames, f)
+
+        return self.__save(first, frames, fp)
+
+    def __save(self, first: Image.Image, frames: Iterator[Image.Image], fp: BinaryIO) -> int:
+        if self.format == "GIF":
+            return self.__save_gif(first, frames, fp)
+
+        return self.__save_mp4(first, frames, fp)
+
+    def __save_gif(self, first: Image.Image, frames: Iterator[Image.Image], fp: BinaryIO) -> int:
+        """ Writes the GIF frame by frame, each with its own palette. """
+
+        duration = round(1000 / self.fps)
+        first = self.__gif_frame(first)
+
+        header, _ = GifImagePlugin.getheader(first, info={"loop": self.__loop})
+        for data in header:
+            fp.write(data)
+
+        count = 0
+        for frame in itertools.chain([first], frames):
+            for data in GifImagePlugin.getdata(self.__gif_frame(frame),
+                                               duration=duration,
+                                               include_color_table=True):
+                fp.write(data)
+            count += 1
+
+        fp.write(b";")  # The trailer of the GIF format
+        return count
+
+    @staticmethod
+    def __gif_frame(frame: Image.Image) -> Image.Image:
+        if frame.mode == "P":
+            return frame
+
+        return frame.convert("RGB").quantize(method=Image.FASTOCTREE)
+
+    def __save_mp4(self, first: Image.Image, frames: Iterator[Image.Image], fp: BinaryIO) -> int:
+        """ Pipes the raw frames into `ffmpeg`, that writes the video into a
+        temporary file (MP4 needs a seekable output), and then copies it. """
+
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("Encoding MP4 animations requires `ffmpeg`.")
+
+        width, height = first.size
+        handle, path = tempfile.mkstemp(suffix=self.extension)
+        os.close(handle)
+
+        try:
+            process = subprocess.Popen([
+                ffmpeg, "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "rgb24",
+                "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+                # H.264 (in yuv420p) needs an even width and height
+                "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                path,
+            ], stdin=subprocess.PIPE)
+
+            count = 0
+            try:
+                for frame in itertools.chain([first], frames):
+                    process.stdin.write(frame.convert("RGB").tobytes())
+                    count += 1
+            finally:
+                process.stdin.close()
+
+            if process.wait() != 0:
+                raise RuntimeError("`ffmpeg` failed to encode the animation.")
+
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, fp)
+        finally:
+            os.remove(path)
+
+        return count
+
+
+class OutputProfile:
+    """
+    Represents one output format of the generated images - for example, an
+    Instagram feed post, an Instagram story or a small web thumbnail.
+
+    The generated content is fitted into the center of the profile's size,
+    and the rest of the image is filled with the color of the content's
+    top-left corner.
+    """
+
+    def __init__(self, name: str, size: Tuple[int, int]):
+        self.__name = name
+        self.__size = tuple(size)
+
+    @property
+    def name(self,) -> str:
+        return self.__name
+
+    @property
+    def size(self,) -> Tuple[int, int]:
+        return self.__size
+
+    def content_size(self, template_size: Tuple[int, int]) -> Tuple[int, int]:
+        """ Returns the largest size that fits inside of this profile, and
+        keeps the ratio of the given template size. """
+
+        template_width, template_height = template_size
+        width, height = self.size
+
+        scale = min(width / template_width, height / template_height)
+        return (round(template_width * scale), round(template_height * scale))
+
+    def fit(self, content: Image.Image) -> Image.Image:
+        """ Returns an image in the size of this profile, with the given
+        content in its center. If the content is already in the size of the
+        profile, it is returned as is (and not copied). """
+
+        if content.size == self.size:
+            return content
+
+        image = Image.new(content.mode, self.size,
+                          color=content.getpixel((0, 0)))
+
+        x = int((self.size[0] - content.width) / 2)
+        y = int((self.size[1] - content.height) / 2)
+        image.paste(content, box=(x, y))
+
+        return image
+
+    def __repr__(self,):
+        return f"OutputProfile({self.name}, {self.size})"
+
+
+class ImageLayer:
+    """
+    A rendered element of a poster: a source (an image, or a solid color)
+    that is pasted onto the poster in the given position through the given
+    mask. Pasting the layers of a poster by their order generates exactly
+    the same pixels as drawing the elements one after the other, so any
+    region of the poster can be composed again without rendering the
+    elements that didn't change.
+    """
+
+    def __init__(self, source, mask: Image.Image, pos: Tuple[int, int]):
+        self.__source = source
+        self.__mask = mask
+        self.__pos = tuple(pos)
+
+    @property
+    def source(self,):
+        return self.__source
+
+    @property
+    def mask(self,) -> Image.Image:
+        return self.__mask
+
+    @property
+    def pos(self,) -> Tuple[int, int]:
+        return self.__pos
+
+    @property
+    def box(self,) -> Tuple[int, int, int, int]:
+        """ The region that the layer covers, as (left, top, right, bottom). """
+
+        x, y = self.pos
+        width, height = self.mask.size
+        return (x, y, x + width, y + height)
+
+    def overlaps(self, box: Tuple[int, int, int, int]) -> bool:
+        left, top, right, bottom = self.box
+        return (left < box[2] and box[0] < right
+                and top < box[3] and box[1] < bottom)
+
+    def paste_on(self, img: Image.Image, origin: Tuple[int, int] = (0, 0)):
+        """ Pastes the layer onto the given image, where `origin` is the
+        position of the image's top left corner in the poster (for pasting
+        onto a cropped region of the poster). """
+
+        x = self.pos[0] - origin[0]
+        y = self.pos[1] - origin[1]
+        img.paste(self.source, box=(x, y), mask=self.mask)
+
+
 class ImageGenerator(StringManagerDependent):
 
     ASSETS_FOLDER = "assets"
@@ -514,17 +1212,15 @@ class ImageGenerator(StringManagerDependent):
     POSTER_PADDING_FROM_SIDES = 0.275  # 1 is the whole width
     POSTER_PADDING_TITLES = -0.025    # 1 is the whole height
 
-    ALTER_FONT = ImageFont.truetype(os.path.join(
-        FONTS_FOLDER, 'Heebo-Medium.ttf'), size=50)
-    TITLE_FONT = ImageFont.truetype(os.path.join(
-        FONTS_FOLDER, 'Heebo-Medium.ttf'), size=75)
-    DATA_FONT = ImageFont.truetype(os.path.join(
-        FONTS_FOLDER, 'Heebo-Black.ttf'), size=100)
+    # Fonts are (path, size) tuples, loaded only when they are first needed.
+    # See the `_get_font` method for more information!
+    ALTER_FONT = (os.path.join(FONTS_FOLDER, 'Heebo-Medium.ttf'), 50)
+    TITLE_FONT = (os.path.join(FONTS_FOLDER, 'Heebo-Medium.ttf'), 75)
+    DATA_FONT = (os.path.join(FONTS_FOLDER, 'Heebo-Black.ttf'), 100)
 
     DATA_PADDING_FROM_SIDES = 0.2  # Perecentage - 1 is the whole width of the image
     SUBTITLE_PADDING = 0.01
-    SUBTITLE_FONT = ImageFont.truetype(os.path.join(
-        FONTS_FOLDER, 'Heebo-Medium.ttf'), size=25)
+    SUBTITLE_FONT = (os.path.join(FONTS_FOLDER, 'Heebo-Medium.ttf'), 25)
 
     SINGLE_DATA_POSTER_ARGUMENTS = {
         "data_font": DATA_FONT,
@@ -542,6 +1238,18 @@ class ImageGenerator(StringManagerDependent):
         "pad_data": 40,
     }
 
+    # Arguments that don't affect the size of the poster, and are not passed
+    # when calculating it. See `__poster_arguments_for_height`.
+    __DRAWING_ONLY_POSTER_ARGUMENTS = {"color", "line_width"}
+
+    # Arguments that are fonts (path, size), loaded and scaled when the
+    # poster is drawn. See `__poster_arguments_for_height`.
+    __FONT_POSTER_ARGUMENTS = {"data_font", "title_font", "alter_font"}
+
+    # Loaded fonts, keyed by (path, size).
+    # See the `_get_font` method for more information!
+    __fonts_cache = dict()
+
     BACKGROUND_COLORS = {
         # Keys are R values.
         # See method `get_background_color` for more information!
@@ -556,19 +1264,39 @@ class ImageGenerator(StringManagerDependent):
     def __init__(self,
                  base_img: Image.Image,
                  string_manager: StringManager = None,
+                 scale: float = 1,
                  ):
+        """ `scale` is the size of the given base image, relative to the size
+        of the template the layout was designed for. Elements with fixed
+        sizes (like the subtitle font and the graphs texts) are scaled by it. """
+
         super().__init__(string_manager)
         self._image = base_img
+        self._scale = scale
 
     @property
     def image(self,):
         return self._image.copy()
 
     def add_background(self, r_value: float):
-        background = Image.new("RGBA", size=self.image.size,
+        self._update_image(self.background_image(r_value))
+
+    @timed("background")
+    def background_image(self, r_value: float) -> Image.Image:
+        """ Returns the current image on top of a background colored by the
+        given R value, without updating the image of the generator. """
+
+        background = Image.new("RGBA", size=self._image.size,
                                color=self._calc_color(r_value))
-        background.alpha_composite(self.image)
-        self._update_image(background)
+        background.alpha_composite(self._image)
+        return background
+
+    def paste_layer(self, layer: ImageLayer):
+        """ Pastes the given layer onto the image. """
+
+        img = self.image
+        layer.paste_on(img)
+        self._update_image(img)
 
     @classmethod
     def test_color_gradint(cls, from_: float, to: float, jumps: float = 0.01):
@@ -602,6 +1330,20 @@ class ImageGenerator(StringManagerDependent):
                          color: str = "black",
                          ):
 
+        self.draw_poster_title(
+            poster,
+            color=color,
+            **self.poster_title_geometry(y_relative=y_relative, side=side),
+        )
+
+    def poster_title_geometry(self,
+                              y_relative: float = 0.5,
+                              side: str = "m",
+                              ) -> dict:
+        """ Returns the position and size (in pixels) of a poster title in the
+        given relative position, as keyword arguments for the
+        `draw_poster_title` method. """
+
         # Assert good `side` value
         if not isinstance(side, str):
             raise TypeError("Poster `side` should be a one character string.")
@@ -614,29 +1356,57 @@ class ImageGenerator(StringManagerDependent):
         elif side == "m":
             x = self._precentage_of_width(0.5)
         elif side == "r":
-            x = self.image.width - \
+            x = self._image.width - \
                 self._precentage_of_width(self.POSTER_PADDING_FROM_SIDES)
         else:
             raise ValueError(
                 "Poster `side` should be assembled using the characters `l` (left), `m` (middle) and `r` (right) only.")
 
+        return {
+            "center": (x, self._precentage_of_height(y_relative)),
+            "width": self._precentage_of_width(self.POSTER_WIDTH),
+            "padding": self._precentage_of_height(self.POSTER_PADDING_TITLES),
+        }
+
+    def draw_poster_title(self,
+                          poster: PosterText,
+                          center: Tuple[int, int],
+                          width: int,
+                          padding: int,
+                          color: str = "black",
+                          ):
+        """ Draws the given poster title, where all of the arguments are in
+        pixels. See the `poster_title_geometry` method. """
+
+        self.paste_layer(self.poster_title_layer(
+            poster, center=center, width=width, padding=padding, color=color))
+
+    @timed("poster_title")
+    def poster_title_layer(self,
+                           poster: PosterText,
+                           center: Tuple[int, int],
+                           width: int,
+                           padding: int,
+                           color: str = "black",
+                           ) -> ImageLayer:
+        """ Returns the layer of the given poster title, without drawing it.
+        See the `draw_poster_title` method. """
+
         # Set font and string manager of title
         poster.set_truetype_font(self.POSTER_FONT_PATH)
         poster.set_string_manager(self._string_manager)
 
         # Generate poster image
         poster_img = poster.to_image(
-            width=self._precentage_of_width(self.POSTER_WIDTH),
-            padding=self._precentage_of_height(self.POSTER_PADDING_TITLES),
+            width=width,
+            padding=padding,
             color=color,
         )
 
-        x -= int(poster_img.width / 2)
-        y = self._precentage_of_height(y_relative) - int(poster_img.height / 2)
+        x = center[0] - int(poster_img.width / 2)
+        y = center[1] - int(poster_img.height / 2)
 
-        img = self.image
-        img.paste(poster_img, box=(x, y), mask=poster_img)
-        self._update_image(img)
+        return ImageLayer(poster_img, mask=poster_img, pos=(x, y))
 
     def add_data(self,
                  data: List[SingleDataPoster],
@@ -644,35 +1414,69 @@ class ImageGenerator(StringManagerDependent):
                  end_relative_y: float,
                  ) -> None:
 
+        self.draw_data(data, **self.data_geometry(
+            count=len(data),
+            start_relative_y=start_relative_y,
+            end_relative_y=end_relative_y,
+        ))
+
+    def data_geometry(self,
+                      count: int,
+                      start_relative_y: float,
+                      end_relative_y: float,
+                      ) -> dict:
+        """ Returns the position and size (in pixels) of `count` data posters
+        between the given relative heights, as keyword arguments for the
+        `draw_data` method. """
+
         start_y = self._precentage_of_height(start_relative_y)
         end_y = self._precentage_of_height(end_relative_y)
-        height = end_y - start_y
 
-        if len(data) > 1:
+        if count > 1:
             pad = self._precentage_of_width(self.DATA_PADDING_FROM_SIDES)
-            work_area = self.image.width - (pad * 2)
-            jump = int(work_area / (len(data) - 1))
+            work_area = self._image.width - (pad * 2)
+            jump = int(work_area / (count - 1))
             x = pad
         else:
             jump = 0
             x = self._precentage_of_width(0.5)
 
-        img = self.image
-
-        for poster in data:
-            poster.set_string_manager(self._string_manager)
-            poster_img = poster.to_image(**self.SINGLE_DATA_POSTER_ARGUMENTS)
-            poster_img = self.__resize_to_height(poster_img, height)
-
-            color_img = Image.new(
-                "RGB", size=poster_img.size, color=self.SINGLE_DATA_POSTER_ARGUMENTS["color"])
+        return {
+            "centers_x": [x + jump * index for index in range(count)],
+            "start_y": start_y,
+            "height": end_y - start_y,
+        }
+
+    def draw_data(self,
+                  data: List[SingleDataPoster],
+                  centers_x: List[int],
+                  start_y: int,
+                  height: int,
+                  ) -> None:
+        """ Draws the given data posters, where all of the arguments are in
+        pixels. See the `data_geometry` method. """
+
+        for poster, x in zip(data, centers_x):
+            self.paste_layer(self.data_poster_layer(
+                poster, center_x=x, start_y=start_y, height=height))
+
+    @timed("data_posters")
+    def data_poster_layer(self,
+                          poster: SingleDataPoster,
+                          center_x: int,
+                          start_y: int,
+                          height: int,
+                          ) -> ImageLayer:
+        """ Returns the layer of a single data poster, without drawing it.
+        See the `draw_data` method. """
 
-            paste_x = x - int(poster_img.width / 2)
-            img.paste(color_img, box=(paste_x, start_y), mask=poster_img)
+        poster.set_string_manager(self._string_manager)
+        poster_img = poster.to_image(
+            **self.__poster_arguments_for_height(poster, height))
 
-            x += jump
-
-        self._update_image(img)
+        paste_x = center_x - int(poster_img.width / 2)
+        return ImageLayer(self.SINGLE_DATA_POSTER_ARGUMENTS["color"],
+                          mask=poster_img, pos=(paste_x, start_y))
 
     def add_graph(self,
                   data: List[int],
@@ -684,31 +1488,18 @@ class ImageGenerator(StringManagerDependent):
                   accent_color="black",
                   ):
 
-        size = tuple([self._precentage_of_width(cur) for cur in relative_size])
-        pos = (
-            self._precentage_of_width(relative_pos[0]),
-            self._precentage_of_height(relative_pos[1])
-        )
-
-        graph_gen = GraphGenerator(string_manager=self._string_manager)
-        graph_gen.set_title(title, title_color)
-
-        graph_gen.add_data(
+        graph_gen = self.build_graph(
             data,
-            min_color=accent_color,
-            max_color=accent_color,
-            color=self._calc_color(r_value),
+            r_value=r_value,
+            title=title,
+            title_color=title_color,
+            accent_color=accent_color,
         )
 
-        base_img = self.image
-        fig_mask = graph_gen.to_img(size=size)
-        fig_img = fig_mask.convert('RGB')
-
-        pos = [cur_pos - int((img_size / 2))
-               for img_size, cur_pos in zip(size, pos)]
-
-        base_img.paste(fig_img, box=pos, mask=fig_mask)
-        self._update_image(base_img)
+        self.draw_graph(graph_gen, **self.graph_geometry(
+            relative_size=relative_size,
+            relative_pos=relative_pos,
+        ))
 
     def add_graph_r_values(self,
                            data: List[int],
@@ -721,13 +1512,35 @@ class ImageGenerator(StringManagerDependent):
                            accent_color="black",
                            ):
 
-        size = tuple([self._precentage_of_width(cur) for cur in relative_size])
-        pos = (
-            self._precentage_of_width(relative_pos[0]),
-            self._precentage_of_height(relative_pos[1])
+        graph_gen = self.build_graph(
+            data,
+            r_value=r_value,
+            title=title,
+            title_color=title_color,
+            accent_color=accent_color,
         )
 
-        graph_gen = GraphGenerator(string_manager=self._string_manager)
+        graph_gen.add_guide_line(y=1, color=accent_color)
+
+        self.draw_graph(graph_gen, **self.graph_geometry(
+            relative_size=relative_size,
+            relative_pos=relative_pos,
+        ))
+
+    @timed("graph_build")
+    def build_graph(self,
+                    data: List[int],
+                    r_value: float,
+                    title: str = None,
+                    title_color=None,
+                    accent_color="black",
+                    backend: str = "matplotlib",
+                    ) -> GraphGenerator:
+        """ Returns a `GraphGenerator` instance with the given data, colored
+        by the given R value. `backend` is one of the keys of
+        `GRAPH_BACKENDS` - matplotlib, or the faster pillow backend. """
+
+        graph_gen = GRAPH_BACKENDS[backend](string_manager=self._string_manager)
         graph_gen.set_title(title, title_color)
 
         graph_gen.add_data(
@@ -735,37 +1548,118 @@ class ImageGenerator(StringManagerDependent):
             color=self._calc_color(r_value),
             min_color=accent_color,
             max_color=accent_color,
+            downsample=True,
         )
 
-        graph_gen.add_guide_line(y=1, color=accent_color)
+        return graph_gen
+
+    def graph_geometry(self,
+                       relative_size: Tuple[int],
+                       relative_pos: Tuple[int],
+                       ) -> dict:
+        """ Returns the size and the top left position (in pixels) of a graph
+        with the given relative size, centered in the given relative
+        position, as keyword arguments for the `draw_graph` method. """
+
+        size = tuple([self._precentage_of_width(cur) for cur in relative_size])
+        pos = (
+            self._precentage_of_width(relative_pos[0]),
+            self._precentage_of_height(relative_pos[1])
+        )
+
+        pos = tuple([cur_pos - int((img_size / 2))
+                     for img_size, cur_pos in zip(size, pos)])
+
+        return {"size": size, "pos": pos}
+
+    def draw_graph(self,
+                   graph_gen: GraphGenerator,
+                   size: Tuple[int, int],
+                   pos: Tuple[int, int],
+                   ):
+        """ Draws the given graph, where all of the arguments are in pixels.
+        See the `graph_geometry` method. """
+
+        self.paste_layer(self.graph_layer(graph_gen, size=size, pos=pos))
+
+    @timed("graph")
+    def graph_layer(self,
+                    graph_gen: GraphGenerator,
+                    size: Tuple[int, int],
+                    pos: Tuple[int, int],
+                    ) -> ImageLayer:
+        """ Returns the layer of the given graph, without drawing it. See the
+        `draw_graph` method. """
 
-        base_img = self.image
-        fig_mask = graph_gen.to_img(size=size)
+        fig_mask = graph_gen.to_img(size=size, scale=self._scale)
         fig_img = fig_mask.convert('RGB')
 
-        pos = [cur_pos - int((img_size / 2))
-               for img_size, cur_pos in zip(size, pos)]
+        return ImageLayer(fig_img, mask=fig_mask, pos=pos)
 
-        base_img.paste(fig_img, box=pos, mask=fig_mask)
-        self._update_image(base_img)
+    def graph_animation_layers(self,
+                               graph_gen: GraphGenerator,
+                               size: Tuple[int, int],
+                               pos: Tuple[int, int],
+                               start: int = 2,
+                               ) -> Iterator[ImageLayer]:
+        """ Yields the layers of the frames of the given graph growing over
+        time. See the `GraphGenerator.animate` method. """
+
+        for fig_mask in graph_gen.animate(size=size, scale=self._scale, start=start):
+            yield ImageLayer(fig_mask.convert('RGB'), mask=fig_mask, pos=pos)
 
     def add_subtitle(self, string: str, color="black"):
         """ Adds a subtitle to the image. """
 
-        padding = self._precentage_of_height(self.SUBTITLE_PADDING)
-        font = self.SUBTITLE_FONT
-
-        img = self.image
-        draw = ImageDraw.Draw(img)
-        size_x, size_y = img.size
+        self.draw_subtitle(string, color=color, **self.subtitle_geometry())
 
-        text_x = int(size_x / 2)
-        text_y = size_y - padding
+    def subtitle_geometry(self,) -> dict:
+        """ Returns the position (in pixels) and the font of the subtitle, as
+        keyword arguments for the `draw_subtitle` method. """
 
-        draw.text((text_x, text_y), get_display(string),
-                  font=font, fill=color, anchor="ms")
-
-        self._update_image(img)
+        padding = self._precentage_of_height(self.SUBTITLE_PADDING)
+        path, size = self.SUBTITLE_FONT
+        font = self._get_font(path, round(size * self._scale))
+
+        size_x, size_y = self._image.size
+
+        return {
+            "pos": (int(size_x / 2), size_y - padding),
+            "font": font,
+        }
+
+    def draw_subtitle(self,
+                      string: str,
+                      pos: Tuple[int, int],
+                      font: ImageFont.FreeTypeFont,
+                      color="black",
+                      ):
+        """ Draws the given subtitle, where the position is in pixels. See the
+        `subtitle_geometry` method. """
+
+        self.paste_layer(self.subtitle_layer(
+            string, pos=pos, font=font, color=color))
+
+    @timed("subtitle")
+    def subtitle_layer(self,
+                       string: str,
+                       pos: Tuple[int, int],
+                       font: ImageFont.FreeTypeFont,
+                       color="black",
+                       ) -> ImageLayer:
+        """ Returns the layer of the given subtitle, without drawing it. See
+        the `draw_subtitle` method. """
+
+        text = get_display(string)
+        left, top, right, bottom = font.getbbox(text, anchor="ms")
+
+        # The text is drawn into a mask and pasted with the color, which is
+        # exactly what drawing it directly onto the image does
+        mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)))
+        ImageDraw.Draw(mask).text((-left, -top), text,
+                                  font=font, fill=255, anchor="ms")
+
+        return ImageLayer(color, mask=mask, pos=(pos[0] + left, pos[1] + top))
 
     # - - - P R I V A T E - A N D - P R O T E C T E D - - - #
 
@@ -830,10 +1724,44 @@ class ImageGenerator(StringManagerDependent):
 
         return tuple(new_color)
 
-    def __resize_to_height(self, img: Image.Image, height: int):
-        """ Returns a copy of the given image, but resized so the image ratio
-        stays the same, and the height of the new image equal the given height. """
+    def __poster_arguments_for_height(self,
+                                      poster: SingleDataPoster,
+                                      height: int,
+                                      ) -> dict:
+        """ Returns a copy of the `SINGLE_DATA_POSTER_ARGUMENTS` dict, where the
+        fonts and the sizes are scaled so the generated poster image will be
+        (about) the given height. This way the poster is drawn directly in the
+        needed size, instead of drawing it large and resizing it. """
+
+        args = self.SINGLE_DATA_POSTER_ARGUMENTS
+        _, poster_height = poster.calc_image_size(**{
+            key: self._get_font(*value) if key in self.__FONT_POSTER_ARGUMENTS else value
+            for key, value in args.items()
+            if key not in self.__DRAWING_ONLY_POSTER_ARGUMENTS
+        })
+        scale = height / poster_height
+
+        scaled_args = dict()
+        for key, value in args.items():
+            if key in self.__FONT_POSTER_ARGUMENTS:
+                path, size = value
+                value = self._get_font(path, round(size * scale))
+            elif isinstance(value, int):
+                value = round(value * scale)
+            scaled_args[key] = value
+
+        # Lines thinner then 1 pixel are not drawn at all
+        scaled_args["line_width"] = max(scaled_args["line_width"], 1)
+
+        return scaled_args
 
-        resize_factor = img.height / height
-        new_width = int(img.width / resize_factor)
-        return img.resize((new_width, height))
+    @classmethod
+    def _get_font(cls, path: str, size: int) -> ImageFont.FreeTypeFont:
+        """ Returns the font in the given path, with the given size. Each font
+        is loaded only once (when it is first needed) and then saved in the
+        cache. """
+
+        key = (path, size)
+        if key not in cls.__fonts_cache:
+            cls.__fonts_cache[key] = ImageFont.truetype(path, size=size)
+        return cls.__fonts_cache[key]
@@ -0,0 +1,340 @@
+import gc
+import io
+import math
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+from grapher import (GraphGenerator, PillowGraphGenerator, GraphGridGenerator,
+                     GraphRenderCache, GRAPH_BACKENDS)
+
+
+class TestGraphGenerator:
+
+    SIZE = (486, 162)
+
+    @staticmethod
+    def build_graph(backend: str = "matplotlib", **kwargs) -> GraphGenerator:
+        graph = GRAPH_BACKENDS[backend](**kwargs)
+        graph.set_title("Title", "black")
+        graph.add_data([10 + 8 * math.sin(day / 5) for day in range(30)],
+                       color=(248, 170, 18))
+        graph.add_guide_line(y=10, color="black")
+        return graph
+
+    def test_to_img_same_as_saved_file(self,):
+        """ Checks that the image copied from the canvas is identical to the
+        image saved into a file. """
+
+        buffer = io.BytesIO()
+        self.build_graph().save(buffer, size=self.SIZE)
+        buffer.seek(0)
+
+        saved = Image.open(buffer)
+        img = self.build_graph().to_img(size=self.SIZE)
+
+        assert img.mode == "RGBA"
+        assert img.size == saved.size == self.SIZE
+        assert np.array_equal(np.asarray(img), np.asarray(saved))
+
+    def test_figures_are_closed(self, monkeypatch):
+        """ Checks that nothing keeps the figures alive after the graphs are
+        drawn, so they are freed like any other object. """
+
+        figures = list()
+        build_empty_fig = GraphGenerator._build_empty_fig
+
+        def recording_build_empty_fig(*args, **kwargs):
+            fig, axes = build_empty_fig(*args, **kwargs)
+            figures.append(weakref.ref(fig))
+            return fig, axes
+
+        monkeypatch.setattr(GraphGenerator, "_build_empty_fig",
+                            staticmethod(recording_build_empty_fig))
+
+        self.build_graph().to_img(size=self.SIZE)
+        self.build_graph().save(io.BytesIO(), size=self.SIZE)
+
+        gc.collect()  # The figure and its canvas reference each other
+        assert len(figures) == 2
+        assert all(figure() is None for figure in figures)
+
+    def test_soak_flat_memory(self,):
+        """ Renders 1,000 graphs and checks that the memory of the process
+        doesn't grow - the figures are released after each graph. """
+
+        resource = pytest.importorskip("resource")
+
+        def max_rss_mb():
+            # Kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        graph = self.build_graph()
+        for _ in range(50):  # Warm up the caches of matplotlib
+            graph.to_img(size=(100, 50))
+
+        before = max_rss_mb()
+        for _ in range(1000):
+            graph.to_img(size=(100, 50))
+
+        assert max_rss_mb() - before < 20
+
+    def test_render_in_threads(self,):
+        """ Checks that graphs rendered in parallel threads are identical to
+        a graph rendered alone. """
+
+        expected = np.asarray(self.build_graph().to_img(size=self.SIZE))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            images = list(executor.map(
+                lambda _: self.build_graph().to_img(size=self.SIZE), range(8)))
+
+        for img in images:
+            assert np.array_equal(np.asarray(img), expected)
+
+    def test_gradient_texture_cache(self,):
+        texture = GraphGenerator._get_gradient_texture((1, 0, 0), 1.0)
+
+        assert GraphGenerator._get_gradient_texture((1, 0, 0), 1.0) is texture
+        assert GraphGenerator._get_gradient_texture((0, 0, 1), 1.0) is not texture
+        assert not texture.flags.writeable
+
+    @pytest.mark.parametrize("size", [(486, 162), (972, 324)])
+    def test_baked_gradient_looks_the_same(self, size):
+        expected = self.build_graph().to_img(size=size)
+        img = self.build_graph(baked_gradient=True).to_img(size=size)
+
+        assert img.size == expected.size
+
+        perceptual = TestPillowGraphGenerator.perceptual
+        difference = np.abs(perceptual(img) - perceptual(expected))
+        assert difference.mean() < 0.5
+
+    def test_downsample_keeps_extremes(self,):
+        data = np.cumsum(np.random.default_rng(0).normal(size=10000))
+        indices = GraphGenerator._downsample(data, buckets=500)
+
+        assert len(indices) <= 2 * 500 + 4
+        assert np.all(np.diff(indices) > 0)
+        for index in (0, len(data) - 1, data.argmin(), data.argmax()):
+            assert index in indices
+
+        # Short data is drawn as is
+        assert np.array_equal(GraphGenerator._downsample(data[:1000], buckets=500),
+                              np.arange(1000))
+
+    @pytest.mark.parametrize("backend", list(GRAPH_BACKENDS))
+    def test_downsampled_graph_looks_the_same(self, backend):
+        data = (1000 + np.cumsum(np.random.default_rng(0).normal(size=5000))).tolist()
+
+        images = list()
+        for downsample in (False, True):
+            graph = GRAPH_BACKENDS[backend]()
+            graph.add_data(data, color=(248, 170, 18), downsample=downsample)
+            images.append(graph.to_img(size=self.SIZE))
+
+        perceptual = TestPillowGraphGenerator.perceptual
+        difference = np.abs(perceptual(images[0]) - perceptual(images[1]))
+        assert difference.mean() < 0.5
+
+    def test_animate(self,):
+        """ Checks that the graph grows by a day in each frame, and that the
+        last frame is identical to the image of the whole graph. """
+
+        frames = list(self.build_graph().animate(size=self.SIZE, start=20))
+        assert len(frames) == 30 - 20 + 1
+        assert all(frame.size == self.SIZE for frame in frames)
+
+        expected = self.build_graph().to_img(size=self.SIZE)
+        assert np.array_equal(np.asarray(frames[-1]), np.asarray(expected))
+
+        # Each frame draws the days it shows again
+        assert not np.array_equal(np.asarray(frames[0]), np.asarray(frames[1]))
+
+
+class TestPillowGraphGenerator:
+
+    @staticmethod
+    def perceptual(img: Image.Image) -> np.ndarray:
+        """ Returns the image as it is seen - on a white background, in
+        grayscale and blurred, so tiny differences of positions and
+        antialiasing are ignored. """
+
+        background = Image.new("RGBA", img.size, "white")
+        background.alpha_composite(img)
+
+        blurred = background.convert("L").filter(ImageFilter.GaussianBlur(2))
+        return np.asarray(blurred, dtype=float)
+
+    @pytest.mark.parametrize("size", [(486, 162), (972, 324), (300, 300)])
+    def test_looks_like_matplotlib(self, size):
+        expected = TestGraphGenerator.build_graph("matplotlib").to_img(size=size)
+        img = TestGraphGenerator.build_graph("pillow").to_img(size=size)
+
+        assert img.mode == "RGBA"
+        assert img.size == expected.size
+
+        difference = np.abs(self.perceptual(img) - self.perceptual(expected))
+        assert difference.mean() < 6
+
+    def test_render_in_threads(self,):
+        """ Checks that graphs rendered in parallel threads (with fonts of
+        different sizes) are identical to graphs rendered alone. """
+
+        sizes = [(486, 162), (972, 324)]
+        expected = [np.asarray(TestGraphGenerator.build_graph("pillow").to_img(size=size))
+                    for size in sizes]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            images = list(executor.map(
+                lambda index: TestGraphGenerator.build_graph("pillow").to_img(
+                    size=sizes[index % 2]),
+                range(16)))
+
+        for index, img in enumerate(images):
+            assert np.array_equal(np.asarray(img), expected[index % 2])
+
+    def test_default_size_and_save(self,):
+        graph = TestGraphGenerator.build_graph("pillow")
+        assert isinstance(graph, PillowGraphGenerator)
+        assert graph.to_img(scale=0.5).size == (320, 240)
+
+        buffer = io.BytesIO()
+        graph.save(buffer, size=(100, 50))
+        buffer.seek(0)
+        assert Image.open(buffer).size == (100, 50)
+
+
+class TestGraphGridGenerator:
+
+    @pytest.mark.parametrize("count, columns, grid_size", [
+        (1, None, (1, 1)),
+        (7, None, (3, 3)),
+        (9, None, (3, 3)),
+        (36, None, (6, 6)),
+        (7, 2, (4, 2)),
+        (3, 5, (1, 3)),
+    ])
+    def test_grid_size(self, count, columns, grid_size):
+        graphs = [TestGraphGenerator.build_graph() for _ in range(count)]
+        assert GraphGridGenerator(graphs, columns=columns).grid_size == grid_size
+
+    def test_draws_each_cell(self,):
+        graphs = [TestGraphGenerator.build_graph() for _ in range(5)]
+        img = GraphGridGenerator(graphs, columns=3).to_img(size=(600, 400), scale=0.3)
+
+        assert img.size == (600, 400)
+
+        # Each of the 5 cells has a graph, and the 6th cell is empty
+        alpha = np.asarray(img.getchannel("A"))
+        cells = [alpha[row * 200:(row + 1) * 200, column * 200:(column + 1) * 200]
+                 for row in range(2) for column in range(3)]
+
+        assert all(cell.any() for cell in cells[:5])
+        assert not cells[5].any()
+
+    def test_fingerprint(self,):
+        graphs = [TestGraphGenerator.build_graph() for _ in range(3)]
+        fingerprint = GraphGridGenerator(graphs).fingerprint()
+
+        assert GraphGridGenerator(graphs).fingerprint() == fingerprint
+        assert GraphGridGenerator(graphs, columns=1).fingerprint() != fingerprint
+        assert GraphGridGenerator(graphs[:2]).fingerprint() != fingerprint
+
+        graphs[0].set_title("Another title")
+        assert GraphGridGenerator(graphs).fingerprint() != fingerprint
+
+
+class TestGraphRenderCache:
+
+    SIZE = (200, 100)
+
+    @pytest.fixture
+    def render_cache(self,):
+        cache = GraphRenderCache()
+        GraphGenerator.set_render_cache(cache)
+        yield cache
+        GraphGenerator.set_render_cache(None)
+
+    @staticmethod
+    def image(color) -> Image.Image:
+        return Image.new("RGBA", (10, 10), color=color)
+
+    def test_lru_eviction(self,):
+        cache = GraphRenderCache(max_items=2)
+        cache.put("a", self.image("red"))
+        cache.put("b", self.image("green"))
+
+        assert cache.get("a") is not None  # "a" is now the most recent
+        cache.put("c", self.image("blue"))
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_disk_cache(self, tmp_path):
+        img = self.image("red")
+        GraphRenderCache(path=str(tmp_path)).put("a", img)
+
+        # A new cache, like in another process
+        cache = GraphRenderCache(path=str(tmp_path))
+        loaded = cache.get("a")
+
+        assert loaded is not None
+        assert np.array_equal(np.asarray(loaded), np.asarray(img))
+        assert cache.get("b") is None
+        assert [path.name for path in tmp_path.iterdir()] == ["a.png"]
+
+    @pytest.mark.parametrize("content", [b"garbage", b"\x89PNG\r\n\x1a\n", None])
+    def test_corrupted_file(self, tmp_path, content):
+        if content is None:
+            # A truncated image
+            buffer = io.BytesIO()
+            self.image("red").save(buffer, format="PNG")
+            content = buffer.getvalue()
+            content = content[:len(content) // 2]
+        (tmp_path / "a.png").write_bytes(content)
+
+        cache = GraphRenderCache(path=str(tmp_path))
+        assert cache.get("a") is None
+        assert not (tmp_path / "a.png").exists()
+
+        cache.put("a", self.image("red"))
+        assert GraphRenderCache(path=str(tmp_path)).get("a") is not None
+
+    @pytest.mark.parametrize("backend", list(GRAPH_BACKENDS))
+    def test_to_img_uses_cache(self, backend, render_cache):
+        build_graph = TestGraphGenerator.build_graph
+
+        first = build_graph(backend).to_img(size=self.SIZE)
+        second = build_graph(backend).to_img(size=self.SIZE)
+
+        assert (render_cache.hits, render_cache.misses) == (1, 1)
+        assert second is not first
+        assert np.array_equal(np.asarray(first), np.asarray(second))
+
+        # A different size, or different data, is rendered again
+        build_graph(backend).to_img(size=(100, 100))
+        graph = build_graph(backend)
+        graph.add_guide_line(y=5)
+        graph.to_img(size=self.SIZE)
+
+        assert (render_cache.hits, render_cache.misses) == (1, 3)
+
+    def test_fingerprint(self,):
+        build_graph = TestGraphGenerator.build_graph
+        fingerprint = build_graph().fingerprint(size=self.SIZE)
+
+        assert build_graph().fingerprint(size=self.SIZE) == fingerprint
+        assert build_graph("pillow").fingerprint(size=self.SIZE) != fingerprint
+        assert build_graph(baked_gradient=True).fingerprint(size=self.SIZE) != fingerprint
+        assert build_graph().fingerprint(size=self.SIZE, scale=2) != fingerprint
+
+        graph = build_graph()
+        graph.add_data([1, 2, 3])
+        assert graph.fingerprint(size=self.SIZE) != fingerprint
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImports:
+
+    # Heavy modules that are imported only when they are needed
+    LAZY_MODULES = ("matplotlib", "googletrans", "instabot")
+
+    @staticmethod
+    def imported_modules(module: str, cwd: str) -> set:
+        """ Imports the given module in a new interpreter, and returns the
+        names of all of the modules that were imported. """
+
+        code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=cwd, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": ROOT},
+        )
+        return set(result.stdout.split())
+
+    @pytest.mark.parametrize("module", ["main", "layout", "painter", "grapher"])
+    def test_heavy_modules_not_imported(self, module, tmp_path):
+        modules = self.imported_modules(module, cwd=str(tmp_path))
+
+        for lazy in self.LAZY_MODULES:
+            assert lazy not in modules
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import instrumentation
+from instrumentation import StageReport
+
+
+class TestInstrumentation:
+
+    def test_disabled(self, monkeypatch):
+        """ Checks that nothing is measured when no hooks are registered -
+        hooks that were removed receive nothing, and the stages are not even
+        measured. """
+
+        report = StageReport()
+
+        @instrumentation.timed("stage")
+        def func():
+            return 42
+
+        with instrumentation.instrumented(report):
+            func()
+        assert report.stats["stage"][0] == 1
+
+        def measure(name):
+            raise AssertionError(f"Measured the stage {name!r} while disabled")
+
+        monkeypatch.setattr(instrumentation, "_measure", measure)
+
+        assert not instrumentation.is_enabled()
+        assert func() == 42
+        with instrumentation.stage("stage"):
+            pass
+
+        assert report.stats["stage"][0] == 1
+
+    def test_report(self,):
+        report = StageReport()
+
+        @instrumentation.timed("decorated")
+        def func():
+            return sum(range(1000))
+
+        with instrumentation.instrumented(report):
+            assert instrumentation.is_enabled()
+
+            func()
+            func()
+            with instrumentation.stage("block"):
+                pass
+
+        assert not instrumentation.is_enabled()
+        assert report.stats["decorated"][0] == 2
+        assert report.stats["block"][0] == 1
+
+        merged = StageReport(report.stats)
+        merged.merge(report.stats)
+        assert merged.stats["decorated"][0] == 4
+        assert "decorated" in merged.to_string()
+
+    def test_peak_allocated(self,):
+        """ Checks that the memory that was freed inside of a stage is still
+        reported, also by the stages around it. """
+
+        report = StageReport()
+
+        with instrumentation.instrumented(report, trace_allocations=True):
+            with instrumentation.stage("outer"):
+                with instrumentation.stage("inner"):
+                    data = bytearray(10 * 1024 * 1024)
+                    del data
+
+                with instrumentation.stage("empty"):
+                    pass
+
+        assert report.stats["inner"][3] >= 10 * 1024 * 1024
+        assert report.stats["outer"][3] >= 10 * 1024 * 1024
+        assert report.stats["empty"][3] < 1024 * 1024
+
+    def test_thread_cpu_time(self,):
+        """ Checks that the CPU time of a stage doesn't include the work of
+        other threads. """
+
+        report = StageReport()
+        done = threading.Event()
+
+        def spin():
+            while not done.is_set():
+                pass
+
+        thread = threading.Thread(target=spin)
+        with instrumentation.instrumented(report):
+            thread.start()
+            try:
+                with instrumentation.stage("sleep"):
+                    time.sleep(0.3)
+            finally:
+                done.set()
+                thread.join()
+
+        calls, wall, cpu, _ = report.stats["sleep"]
+        assert wall >= 0.3
+        assert cpu < 0.1
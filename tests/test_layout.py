@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+from layout import PosterLayout, RenderSession
+from painter import ImageGenerator, PosterText
+
+
+class TestPosterLayout:
+
+    LAYOUT_PATH = "assets/layouts/default.json"
+
+    def test_compile_once(self,):
+        """ Checks that each size of the layout is compiled only once. """
+
+        layout = PosterLayout.from_file(self.LAYOUT_PATH)
+
+        compiled = layout.compile()
+        assert compiled is layout.compile()
+        assert compiled.size == layout.template_size
+        assert compiled.slot_names == layout.slot_names
+
+        small = layout.compile((1080, 1080))
+        assert small is layout.compile((1080, 1080))
+        assert small is not compiled
+        assert small.size == (1080, 1080)
+
+    def test_missing_bindings(self,):
+        layout = PosterLayout.from_file(self.LAYOUT_PATH)
+
+        with pytest.raises(ValueError):
+            layout.compile().render({"background": 1.0})
+
+    def test_invalid_slot_type(self,):
+        with pytest.raises(AssertionError):
+            PosterLayout({
+                "template": "assets/background-template.png",
+                "slots": [{"name": "map", "type": "map"}],
+            })
+
+    def test_invalid_graph_backend(self,):
+        with pytest.raises(AssertionError):
+            PosterLayout({
+                "template": "assets/background-template.png",
+                "slots": [{"name": "graph", "type": "graph", "backend": "svg"}],
+            })
+
+
+class TestIncrementalRender:
+
+    SPEC = {
+        "template": "assets/background-template.png",
+        "slots": [
+            {"name": "background", "type": "background"},
+            {"name": "title", "type": "title", "y": 0.3},
+            {"name": "subtitle", "type": "subtitle"},
+        ],
+    }
+
+    @staticmethod
+    def bindings(r_value=1.0, title="Title", subtitle="Subtitle"):
+        return {
+            "background": r_value,
+            "title": PosterText(title),
+            "subtitle": subtitle,
+        }
+
+    @classmethod
+    def full_render(cls, bindings):
+        layout = PosterLayout(cls.SPEC).compile((540, 540))
+        return layout.render(bindings)
+
+    @staticmethod
+    def assert_same_image(img1, img2):
+        assert np.array_equal(np.asarray(img1), np.asarray(img2))
+
+    @pytest.mark.parametrize("changes", [
+        {"subtitle": "Another subtitle"},
+        {"title": "Another title"},
+        {"r_value": 1.5},
+        dict(),
+    ])
+    def test_same_as_full_render(self, changes):
+        layout = PosterLayout(self.SPEC).compile((540, 540))
+        session = RenderSession()
+        layout.render(self.bindings(), session=session)
+
+        bindings = self.bindings(**changes)
+        self.assert_same_image(layout.render(bindings, session=session),
+                               self.full_render(bindings))
+
+    def test_renders_only_changed_layers(self, monkeypatch):
+        layout = PosterLayout(self.SPEC).compile((540, 540))
+        session = RenderSession()
+        layout.render(self.bindings(), session=session)
+
+        rendered = list()
+        for method in ("poster_title_layer", "subtitle_layer"):
+            original = getattr(ImageGenerator, method)
+            monkeypatch.setattr(
+                ImageGenerator, method,
+                lambda self, *args, method=method, original=original, **kwargs:
+                    rendered.append(method) or original(self, *args, **kwargs),
+            )
+
+        layout.render(self.bindings(subtitle="Another subtitle"), session=session)
+        assert rendered == ["subtitle_layer"]
+
+        rendered.clear()
+        layout.render(self.bindings(subtitle="Another subtitle"), session=session)
+        assert rendered == []
+
+        # Without a session, everything is rendered
+        rendered.clear()
+        layout.render(self.bindings(subtitle="Another subtitle"))
+        assert rendered == ["poster_title_layer", "subtitle_layer"]
+
+    def test_countries_in_turn(self,):
+        """ Renders the posters of two countries in turn from the same
+        layout - each with its own session, like two bots. """
+
+        poster_layout = PosterLayout(self.SPEC)
+        countries = {
+            "IL": (self.bindings(r_value=0.8, title="Israel"), RenderSession()),
+            "FR": (self.bindings(r_value=1.5, title="France"), RenderSession()),
+        }
+
+        for _ in range(2):
+            for bindings, session in countries.values():
+                self.assert_same_image(
+                    poster_layout.compile((540, 540)).render(bindings, session=session),
+                    self.full_render(bindings))
+
+        # A session follows the layout it rendered last
+        bindings, session = countries["IL"]
+        self.assert_same_image(
+            poster_layout.compile((270, 270)).render(bindings, session=session),
+            PosterLayout(self.SPEC).compile((270, 270)).render(bindings))
+
+
+class TestAnimation:
+
+    SPEC = TestIncrementalRender.SPEC
+    bindings = staticmethod(TestIncrementalRender.bindings)
+
+    def test_frames_same_as_render(self,):
+        """ Checks that each frame is identical to the poster rendered with
+        the R value of the frame. """
+
+        layout = PosterLayout(self.SPEC).compile((540, 540))
+        r_values = [0.8, 1.2, 1.2, 1.5]
+
+        frames = list(layout.animate(self.bindings(r_value=r_values)))
+        assert len(frames) == len(r_values)
+
+        for frame, r_value in zip(frames, r_values):
+            TestIncrementalRender.assert_same_image(
+                frame, TestIncrementalRender.full_render(self.bindings(r_value=r_value)))
+
+    def test_frames_count(self,):
+        layout = PosterLayout(self.SPEC).compile((540, 540))
+
+        assert len(list(layout.animate(self.bindings(), frames=3))) == 3
+
+        with pytest.raises(AssertionError):
+            list(layout.animate(self.bindings()))
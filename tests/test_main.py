@@ -0,0 +1,114 @@
+import datetime
+import io
+import json
+import logging
+import math
+
+import pytest
+from PIL import Image
+
+import main
+from hopkins_api import CountryData
+from main import CountryConfig, CovidStatsInstagramBot, render_all
+from painter import AnimationEncoder
+from translator import Country
+
+
+def country_rows(days: int = 120) -> list:
+    """ Returns the rows of a made up country, like the rows of the
+    `CovidHistoryDatabase`. """
+
+    rows = list()
+    confirmed = deaths = recovered = 0
+
+    for day in range(days):
+        confirmed += int(1000 + 800 * math.sin(day / 30))
+        deaths += day % 7
+        recovered += int(600 + 400 * math.sin(day / 20))
+
+        rows.append({
+            "date": datetime.date(2020, 1, 22) + datetime.timedelta(days=day),
+            "confirmed": confirmed,
+            "deaths": deaths,
+            "recovered": recovered,
+        })
+
+    return rows
+
+
+class StubDatabase:
+    """ A stand-in for `CovidHistoryDatabase`, that doesn't use the network. """
+
+    def country_data(self, country: str) -> list:
+        return country_rows()
+
+
+class TestRenderAll:
+
+    def test_render_all(self, monkeypatch, caplog):
+        """ Renders a batch where one of the countries fails, and checks that
+        the rest of the batch is still generated. """
+
+        monkeypatch.setattr(main, "CovidHistoryDatabase", StubDatabase)
+
+        good = CountryConfig(Country("US"), dict())
+        bad = CountryConfig(Country("US"), {"layout": "assets/layouts/missing.json"})
+
+        with caplog.at_level(logging.ERROR):
+            results = list(render_all([bad, good], workers=1))
+
+        assert len(results) == 1
+        config, img = results[0]
+
+        assert config is good
+        assert isinstance(img, Image.Image)
+        assert img.size == main.CovidStatsInstagramBot._get_layout(
+            main.CovidStatsInstagramBot.LAYOUT_PATH).template_size
+
+        assert "Failed to generate the image" in caplog.text
+
+
+class TestAnimation:
+
+    def test_save_animation(self,):
+        """ Saves the animation of a made up country, and checks that it has
+        a frame for each day, in the size of the poster. """
+
+        bot = CovidStatsInstagramBot("US", country_data=CountryData(country_rows()))
+
+        buffer = io.BytesIO()
+        count = bot.save_animation(buffer, days=3, encoder=AnimationEncoder("GIF", fps=2))
+        assert count == 3
+
+        animation = Image.open(io.BytesIO(buffer.getvalue()))
+        assert animation.format == "GIF"
+        assert animation.n_frames == 3
+        assert animation.size == bot._get_layout(bot.LAYOUT_PATH).template_size
+
+
+class TestCustomLayout:
+
+    @staticmethod
+    def bot(tmp_path, slots: list) -> CovidStatsInstagramBot:
+        path = tmp_path / "layout.json"
+        path.write_text(json.dumps({
+            "template": "assets/background-template.png",
+            "slots": slots,
+        }))
+
+        return CovidStatsInstagramBot(
+            "US", country_data=CountryData(country_rows()), layout_path=str(path))
+
+    def test_some_of_the_slots(self, tmp_path):
+        bot = self.bot(tmp_path, [
+            {"name": "background", "type": "background"},
+            {"name": "subtitle", "type": "subtitle"},
+        ])
+
+        assert isinstance(bot.to_image(), Image.Image)
+
+    def test_unknown_slot(self, tmp_path):
+        bot = self.bot(tmp_path, [{"name": "headline", "type": "subtitle"}])
+
+        with pytest.raises(ValueError, match="headline.*subtitle"):
+            bot.to_image()
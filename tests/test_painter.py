@@ -0,0 +1,268 @@
+import io
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image as PILImage
+from PIL import ImageDraw, ImageFilter, ImageFont
+from PIL.Image import Image
+
+from painter import (SingleDataPoster, OutputProfile, ImageEncoder, AnimationEncoder,
+                     GlyphAtlas, ImageGenerator)
+
+
+class TestSingleDataPoster:
+
+    def test_icon_cache(self,):
+        """ Checks that tinted icons are generated only once, and are reused
+        by posters that share the same kind, color and size. """
+
+        icon = SingleDataPoster._get_icon("arrow-up", color="white", size=50)
+
+        assert isinstance(icon, Image)
+        assert icon.size == (50, 50)
+        assert icon.mode == 'RGBA'
+
+        assert icon is SingleDataPoster._get_icon(
+            "arrow-up", color="white", size=(50, 50))
+        assert icon is not SingleDataPoster._get_icon(
+            "arrow-down", color="white", size=50)
+        assert icon is not SingleDataPoster._get_icon(
+            "arrow-up", color="black", size=50)
+
+    class CountingFont:
+        """ Wraps a font, and counts the times it measures the size of a
+        text (the glyph atlas measures the glyphs with an anchor). """
+
+        def __init__(self, font):
+            self.font = font
+            self.measure_calls = 0
+
+        def getbbox(self, text, *args, **kwargs):
+            if not args and "anchor" not in kwargs:
+                self.measure_calls += 1
+            return self.font.getbbox(text, *args, **kwargs)
+
+        def getsize(self, *args, **kwargs):
+            self.measure_calls += 1
+            return self.font.getsize(*args, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self.font, name)
+
+    def test_measures_each_text_once(self,):
+        """ Checks that drawing a poster measures each of its strings only
+        once (instead of once for each size calculation). """
+
+        data_font, title_font, alter_font = [
+            self.CountingFont(ImageFont.truetype(*font)) for font in (
+                ImageGenerator.DATA_FONT,
+                ImageGenerator.TITLE_FONT,
+                ImageGenerator.ALTER_FONT,
+            )
+        ]
+
+        SingleDataPoster("Deaths", now=1200, prev=1000).to_image(
+            data_font=data_font, title_font=title_font, alter_font=alter_font,
+            icon_size=50)
+
+        assert data_font.measure_calls == 1  # The number
+        assert title_font.measure_calls == 1  # The title
+        assert alter_font.measure_calls == 2  # The delta and the precentage
+
+    def test_alter_image_font(self,):
+        """ Checks that the alter text is measured with the font it is drawn
+        with, even if the given layout uses another font. """
+
+        poster = SingleDataPoster("Deaths", now=1200, prev=1000)
+        small = ImageFont.truetype(ImageGenerator.ALTER_FONT[0], 20)
+        large = ImageFont.truetype(ImageGenerator.ALTER_FONT[0], 80)
+
+        img = poster.alter_stats_image(font=large, icon_size=50,
+                                       layout=poster.layout(data_font=small))
+        assert img.size == poster.alter_stats_image(font=large, icon_size=50).size
+
+
+class TestGlyphAtlas:
+
+    FONT_PATH = "assets/fonts/Heebo-Black.ttf"
+
+    @pytest.mark.parametrize('size', [25, 50, 100])
+    @pytest.mark.parametrize('anchor', [None, 'ma', 'lm', 'rm'])
+    @pytest.mark.parametrize('text', ['0', '280,512', '+1019', '-0.36%'])
+    def test_identical_to_draw_text(self, size: int, anchor: str, text: str):
+        """ Checks that numbers drawn using the atlas are identical to the
+        numbers drawn by `ImageDraw.text`. """
+
+        font = ImageFont.truetype(self.FONT_PATH, size=size)
+        atlas = GlyphAtlas.for_font(font)
+        assert atlas.text_mask(text, anchor=anchor) is not None
+
+        expected = PILImage.new("RGBA", (size * 6, size * 2), color=(0, 0, 0, 0))
+        result = expected.copy()
+        xy = (size * 3, size)
+
+        ImageDraw.Draw(expected).text(
+            xy, text, fill="white", font=font, anchor=anchor)
+        atlas.draw_text(result, xy, text, fill="white", anchor=anchor)
+
+        assert result.tobytes() == expected.tobytes()
+
+    def test_unsupported_text(self,):
+        font = ImageFont.truetype(self.FONT_PATH, size=50)
+        atlas = GlyphAtlas.for_font(font)
+
+        assert atlas is GlyphAtlas.for_font(
+            ImageFont.truetype(self.FONT_PATH, size=50))
+        assert not atlas.supports("Unchanged")
+        assert atlas.text_mask("Unchanged") is None
+
+
+class TestImageGenerator:
+
+    @staticmethod
+    def data_image(side: int) -> Image:
+        """ Draws the data posters onto a black square image of the given
+        size (the posters are white). """
+
+        generator = ImageGenerator(PILImage.new("RGBA", (side, side), "black"))
+        generator.add_data([
+            SingleDataPoster("Deaths", now=1200, prev=1000),
+            SingleDataPoster("Recovered", now=5, prev=5),
+            SingleDataPoster("Active Cases", now=10, prev=0),
+        ], start_relative_y=0.1, end_relative_y=0.3)
+
+        return generator.image
+
+    @staticmethod
+    def blurred(img: Image) -> np.ndarray:
+        return np.asarray(img.convert("L").filter(ImageFilter.GaussianBlur(2)), dtype=float)
+
+    def test_data_drawn_at_target_size(self,):
+        """ Checks that the data posters drawn directly at a small size look
+        like the posters drawn at a large size and resized. """
+
+        large = self.data_image(1080)
+        small = self.data_image(540)
+
+        assert large.size == (1080, 1080)
+        assert small.size == (540, 540)
+
+        expected = self.blurred(large.resize(small.size, PILImage.LANCZOS))
+        difference = np.abs(self.blurred(small) - expected)
+
+        assert expected.mean() > 5  # The posters are drawn
+        assert difference.mean() < 2
+
+    def test_data_fits_height(self,):
+        generator = ImageGenerator(PILImage.new("RGBA", (540, 540), "black"))
+
+        for height in (50, 100, 200):
+            layer = generator.data_poster_layer(
+                SingleDataPoster("Deaths", now=1200, prev=1000),
+                center_x=270, start_y=0, height=height)
+
+            assert abs(layer.box[3] - height) <= max(2, height * 0.05)
+
+
+class TestOutputProfile:
+
+    def test_content_size(self,):
+        story = OutputProfile("story", (1080, 1920))
+        thumbnail = OutputProfile("thumbnail", (320, 320))
+
+        assert story.content_size((1920, 1920)) == (1080, 1080)
+        assert thumbnail.content_size((1920, 1920)) == (320, 320)
+
+    def test_fit(self,):
+        content = PILImage.new("RGBA", (1080, 1080), color="white")
+
+        feed = OutputProfile("feed", (1080, 1080))
+        assert feed.fit(content) is content
+
+        story = OutputProfile("story", (1080, 1920))
+        story_img = story.fit(content)
+        assert story_img.size == (1080, 1920)
+        assert story_img.getpixel((0, 0)) == content.getpixel((0, 0))
+
+
+class TestImageEncoder:
+
+    @pytest.mark.parametrize('image_format', ['JPEG', 'WEBP', 'PNG'])
+    def test_encode(self, image_format: str):
+        """ Encodes an image in memory, and checks that it can be decoded
+        back in the same format and size. """
+
+        img = PILImage.new("RGBA", (100, 50), color=(255, 0, 0, 255))
+        data = ImageEncoder(image_format, quality=80).encode(img)
+
+        assert isinstance(data, bytes)
+
+        decoded = PILImage.open(io.BytesIO(data))
+        assert decoded.format == image_format
+        assert decoded.size == img.size
+
+    def test_invalid_format(self,):
+        with pytest.raises(ValueError):
+            ImageEncoder("BMP")
+
+
+class TestAnimationEncoder:
+
+    def test_gif(self,):
+        """ Encodes a stream of frames, and checks that the GIF is decoded
+        back with every frame. """
+
+        colors = ["red", "green", "blue", "white"]
+        frames = (PILImage.new("RGBA", (60, 40), color=color) for color in colors)
+
+        buffer = io.BytesIO()
+        count = AnimationEncoder("GIF", fps=5).save(frames, buffer)
+        assert count == len(colors)
+
+        decoded = PILImage.open(io.BytesIO(buffer.getvalue()))
+        assert decoded.format == "GIF"
+        assert decoded.size == (60, 40)
+        assert decoded.n_frames == len(colors)
+        assert decoded.info["duration"] == 200
+
+        for index, color in enumerate(colors):
+            decoded.seek(index)
+            expected = PILImage.new("RGB", (1, 1), color=color).getpixel((0, 0))
+            assert decoded.convert("RGB").getpixel((30, 20)) == expected
+
+    def test_invalid_format(self,):
+        with pytest.raises(ValueError):
+            AnimationEncoder("AVI")
+
+        with pytest.raises(ValueError):
+            AnimationEncoder("GIF").save([], io.BytesIO())
+
+        with pytest.raises(ValueError):
+            AnimationEncoder("GIF", fps=0)
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="Requires ffmpeg")
+    def test_mp4(self, tmp_path):
+        # An odd size, which is padded for H.264
+        frames = (PILImage.new("RGB", (61, 41), color=color)
+                  for color in ["red", "green", "blue"])
+
+        path = str(tmp_path / "animation.mp4")
+        assert AnimationEncoder("MP4", fps=5).save(frames, path) == 3
+
+        with open(path, 'rb') as f:
+            assert f.read(12)[4:8] == b"ftyp"
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="Requires ffmpeg")
+    def test_mp4_file_object(self,):
+        frames = (PILImage.new("RGBA", (60, 40), color=color) for color in ["red", "blue"])
+
+        buffer = io.BytesIO()
+        assert AnimationEncoder("MP4", fps=2).save(frames, buffer) == 2
+        assert buffer.getvalue()[4:8] == b"ftyp"
+
+    def test_mp4_without_ffmpeg(self, monkeypatch):
+        monkeypatch.setattr(shutil, "which", lambda name: None)
+
+        with pytest.raises(RuntimeError):
+            AnimationEncoder("MP4").save([PILImage.new("RGB", (60, 40))], io.BytesIO())
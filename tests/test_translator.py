@@ -0,0 +1,315 @@
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from translator import (Country, StringManager, TranslationCache, TranslationCatalog,
+                        NumberFormatter, get_locale)
+
+
+class FakeTranslator:
+    """ A local stand-in for `googletrans.Translator`, that counts the
+    requests and the strings it translates. """
+
+    def __init__(self, translate=None):
+        self.requests = 0
+        self.translated = list()
+        self.__translate = translate
+
+    def translate(self, text, dest: str, src: str):
+        self.requests += 1
+
+        if isinstance(text, list):
+            return [self.__result(cur, dest) for cur in text]
+        return self.__result(text, dest)
+
+    def __result(self, text: str, dest: str):
+        self.translated.append(text)
+
+        if self.__translate is not None:
+            return SimpleNamespace(text=self.__translate(text))
+        return SimpleNamespace(text=f"[{dest}] {text}")
+
+
+class TestTranslationCache:
+
+    @pytest.fixture
+    def translation_cache(self,):
+        """ Sets a translation cache for the test, and removes it after. """
+
+        previous = StringManager.get_translation_cache()
+        cache = TranslationCache()
+        StringManager.set_translation_cache(cache)
+
+        yield cache
+
+        StringManager.set_translation_cache(previous)
+
+    @staticmethod
+    def string_manager(translator) -> StringManager:
+        sm = StringManager()
+        sm.config_translator("de_DE", translator=translator)
+        return sm
+
+    def test_translate_uses_cache(self, translation_cache):
+        translator = FakeTranslator()
+
+        sm = self.string_manager(translator)
+        assert sm.deaths == "[de_DE] Deaths"
+
+        # Other string managers share the cache
+        assert self.string_manager(translator).deaths == "[de_DE] Deaths"
+
+        assert translator.requests == 1
+        assert sorted(translator.translated) == sorted(StringManager.BASE_STRINGS.values())
+        assert translation_cache.hits == len(StringManager.BASE_STRINGS)
+        assert translation_cache.get("en_US", "de_DE", "Deaths") == "[de_DE] Deaths"
+        assert translation_cache.get("en_US", "ar_EG", "Deaths") is None
+
+    def test_disk_cache(self, tmp_path):
+        path = str(tmp_path / "translations.json")
+
+        cache = TranslationCache(path=path)
+        cache.put("en_US", "he_IL", "Deaths", "מקרי מוות")
+
+        # A new process (or run) loads the saved translations
+        cache = TranslationCache(path=path)
+        assert cache.get("en_US", "he_IL", "Deaths") == "מקרי מוות"
+        assert len(cache) == 1
+
+        # Translations saved by another process are not overwritten
+        TranslationCache(path=path).put("en_US", "he_IL", "Recovered", "החלימו")
+        cache.put("en_US", "he_IL", "New Cases", "מקרים חדשים")
+        assert len(TranslationCache(path=path)) == 3
+
+    @pytest.mark.parametrize("content", [
+        "{\"version\": 1, \"translations\": [",
+        json.dumps({"version": 1}),
+        json.dumps({"version": 1, "translations": [["en_US", "he_IL"]]}),
+        json.dumps([1, 2, 3]),
+    ])
+    def test_corrupted_file(self, tmp_path, content):
+        path = tmp_path / "translations.json"
+        path.write_text(content)
+
+        cache = TranslationCache(path=str(path))
+        assert cache.get("en_US", "he_IL", "Deaths") is None
+
+        # The file is fixed when a translation is saved
+        cache.put("en_US", "he_IL", "Deaths", "מקרי מוות")
+        assert TranslationCache(path=str(path)).get("en_US", "he_IL", "Deaths") == "מקרי מוות"
+
+    def test_file_saved_once(self, tmp_path, monkeypatch, translation_cache):
+        """ Checks that the file is written once for all of the translations
+        of a prefetch. """
+
+        cache = TranslationCache(path=str(tmp_path / "translations.json"))
+        StringManager.set_translation_cache(cache)
+
+        stores = list()
+        replace = os.replace
+        monkeypatch.setattr(os, "replace", lambda *args: stores.append(args) or replace(*args))
+
+        self.string_manager(FakeTranslator())
+        assert len(stores) == 1
+        assert len(TranslationCache(path=cache.path)) == len(StringManager.BASE_STRINGS)
+
+    def test_ttl(self, monkeypatch):
+        cache = TranslationCache(ttl=60)
+        cache.put("en_US", "he_IL", "Deaths", "מקרי מוות")
+        assert cache.get("en_US", "he_IL", "Deaths") == "מקרי מוות"
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert cache.get("en_US", "he_IL", "Deaths") is None
+        assert cache.misses == 1
+
+
+class TestTranslationPrefetch:
+
+    def test_prefetch_in_one_request(self,):
+        translator = FakeTranslator()
+
+        sm = StringManager()
+        sm.config_translator("de_DE", translations={"Deaths": "Todesfälle"},
+                             translator=translator)
+
+        assert translator.requests == 1
+        assert sorted(translator.translated) == sorted(
+            string for key, string in StringManager.BASE_STRINGS.items()
+            if key != "deaths")
+
+        # Reading the properties doesn't translate anything
+        assert sm.deaths == "Todesfälle"
+        assert sm.recovered == "[de_DE] Recovered"
+        assert sm.r_graph_title(days=30) == \
+            "[de_DE] Basic reproduction (R) in the last 30 days"
+        assert sm.r_graph_title(days=60) == \
+            "[de_DE] Basic reproduction (R) in the last 60 days"
+        assert translator.requests == 1
+
+    def test_lost_placeholders(self,):
+        """ Templates whose translation lost the placeholders are in the base
+        language. """
+
+        translator = FakeTranslator(lambda text: text.replace("{days}", "X"))
+
+        sm = StringManager()
+        sm.config_translator("de_DE", translator=translator)
+
+        assert sm.new_cases_graph_title(days=30) == \
+            "New cases a day in the last 30 days"
+        assert translator.requests == 1
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_never_translates_on_read(self, prefetch):
+        """ Strings that were not prefetched (because the translator failed,
+        or the prefetch is disabled) are in the base language. """
+
+        def translate(text):
+            raise ConnectionError("No network")
+
+        translator = FakeTranslator(translate)
+
+        sm = StringManager()
+        sm.config_translator("de_DE", translator=translator, prefetch=prefetch)
+        requests = translator.requests
+
+        assert sm.deaths == "Deaths"
+        assert sm.r_graph_title(days=30) == \
+            "Basic reproduction (R) in the last 30 days"
+        assert translator.requests == requests
+
+    def test_base_language(self,):
+        translator = FakeTranslator()
+
+        sm = StringManager()
+        sm.config_translator("en_US", translator=translator)
+
+        assert sm.new_cases_graph_title(days=30) == \
+            "New cases a day in the last 30 days"
+        assert translator.requests == 0
+
+
+class TestNumberFormatter:
+
+    @pytest.mark.parametrize("lang_code, number, kwargs, expected", [
+        ("en_US", 1234567, dict(), "1,234,567"),
+        ("en_US", -1234567, dict(), "-1,234,567"),
+        ("en_US", 5, dict(leading_zeros=4), "0,005"),
+        ("en_US", 1234.5678, dict(), "1,234.57"),
+        ("en_US", 1.23456, dict(floating_max=2), "1.23"),
+        ("en_US", 12, dict(floating_max=2), "12"),
+        ("de_DE", 1234567, dict(), "1.234.567"),
+        ("de_DE", 1234.5, dict(), "1.234,5"),
+        ("hi_IN", 12345678, dict(), "1,23,45,678"),
+    ])
+    def test_format(self, lang_code, number, kwargs, expected):
+        assert NumberFormatter(lang_code).format(number, **kwargs) == expected
+
+    def test_string_manager(self,):
+        sm = StringManager()
+        assert sm.format_number(1234567) == "1,234,567"
+
+        sm.config_translator("de_DE", prefetch=False)
+        assert sm.format_number(1234567) == "1.234.567"
+
+    def test_threads(self,):
+        """ Formats numbers in different languages at the same time. """
+
+        managers = list()
+        for lang_code in ("en_US", "de_DE"):
+            sm = StringManager()
+            sm.config_translator(lang_code, prefetch=False)
+            managers.append(sm)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda index: managers[index % 2].format_number(1234567),
+                range(1000)))
+
+        assert results == ["1,234,567", "1.234.567"] * 500
+
+
+class TestCountry:
+
+    def test_created_once(self,):
+        country = Country("il")
+
+        assert Country("IL") is country
+        assert pickle.loads(pickle.dumps(country)) is country
+        assert Country("FR") is not country
+
+        assert country.code == "IL"
+        assert country.lang_code == "HE"
+        assert country.lang_locale is get_locale("he")
+
+    def test_invalid_code(self,):
+        with pytest.raises(TypeError):
+            Country(972)
+
+        with pytest.raises(ValueError):
+            Country("ISR")
+
+    def test_locale_cache(self,):
+        assert get_locale("he_IL") is get_locale("he_IL")
+        assert str(get_locale("he_IL")) == "he_IL"
+
+
+class TestTranslationCatalog:
+
+    def test_lang_config_complete(self,):
+        """ Checks that every language in `lang_config` translates all of the
+        strings, so they are never translated at render time. """
+
+        catalogs = TranslationCatalog.compile_all()
+        assert "he" in catalogs
+
+        for catalog in catalogs.values():
+            assert catalog.missing_keys(StringManager.BASE_STRINGS) == []
+
+    def test_shared(self,):
+        catalog = TranslationCatalog.get("he_IL")
+
+        assert catalog is TranslationCatalog.get("he_IL")
+        assert catalog is not None and "Deaths" in catalog
+        assert TranslationCatalog.get("xx_XX") is None
+
+    def test_templates(self,):
+        catalog = TranslationCatalog({" Title ": "{count} of {days} days - {days}"})
+
+        template = catalog.template("title")
+        assert TranslationCatalog.placeholders(template) == ("count", "days", "days")
+        assert TranslationCatalog.fill_template(template, {"days": 30}) == \
+            "{count} of 30 days - 30"
+
+    def test_from_folder(self, tmp_path):
+        (tmp_path / "a.json").write_text(json.dumps({"deaths": "A", "recovered": "A"}))
+        (tmp_path / "b.json").write_text(json.dumps({"recovered": "B"}))
+
+        catalog = TranslationCatalog.from_folder(str(tmp_path))
+        assert catalog.strings == {"deaths": "A", "recovered": "B"}
+
+    def test_string_manager(self,):
+        """ The catalog of the language is used without the translator, and
+        the missing keys are known up front. """
+
+        translator = FakeTranslator()
+
+        sm = StringManager()
+        sm.config_country_translator("IL", translator=translator,
+                                     translations={"deaths": "Override"})
+
+        assert sm.missing_translations == []
+        assert sm.deaths == "Override"
+        assert sm.recovered == TranslationCatalog.get("he").string("recovered")
+        assert "30" in sm.r_graph_title(days=30)
+        assert "{date}" not in sm.caption("X")
+        assert translator.requests == 0
+
+        sm.config_translator("de_DE", translator=FakeTranslator(), prefetch=False)
+        assert sm.missing_translations == list(StringManager.BASE_STRINGS)
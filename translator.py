@@ -1,27 +1,69 @@
 import babel
 import babel.languages
 import babel.dates
-import locale
 from bidi.algorithm import get_display
-from googletrans import Translator
 import datetime
 
-from typing import Union
+from typing import Union, Optional, List, Iterable, Tuple
+import glob
 import os
+import re
+import json
+import logging
+import tempfile
+import threading
+import time
 from abc import ABC
 
+logger = logging.getLogger(__name__)
+
+# Parsed babel locales, keyed by their code. See the `get_locale` function.
+_locales = dict()
+
+
+def get_locale(code: str) -> babel.Locale:
+    """ Returns the babel locale of the given code (like `en` or `he_IL`).
+    Each locale is parsed only once, and shared by the whole process. """
+
+    locale = _locales.get(code)
+    if locale is None:
+        locale = _locales[code] = babel.Locale.parse(code)
+
+    return locale
+
 
 class Country:
+    """
+    A country and its most popular language. Countries are immutable, and
+    each country is created only once in the process - so creating the same
+    country again (like `Country("IL")`) returns the same instance, without
+    looking up the locale data of babel again.
+    """
+
+    # Created countries, keyed by their class and their (upper case) code.
+    # See the `__new__` method for more information!
+    __countries = dict()
+
+    def __new__(cls, country_code: str):
+        cls._assert_valid_country_code(country_code)
 
-    def __init__(self, country_code: str):
-        self._assert_valid_country_code(country_code)
+        key = (cls, country_code.upper())
+        country = Country.__countries.get(key)
 
-        base_lang = babel.Locale('en')
+        if country is None:
+            country = super().__new__(cls)
+            country.__load(country_code.upper())
+            country = Country.__countries.setdefault(key, country)
 
-        self.__code = country_code.upper()
+        return country
+
+    def __load(self, code: str):
+        base_lang = get_locale('en')
+
+        self.__code = code
         self.__name = base_lang.territories[self.code]
         self.__lang_code = self._get_territory_language_code(self.code).upper()
-        self.__lang_locale = babel.Locale(self.lang_code.lower())
+        self.__lang_locale = get_locale(self.lang_code.lower())
         self.__lang_name = self.lang_locale.get_display_name(base_lang)
 
     @property
@@ -60,14 +102,387 @@ class Country:
         if len(code) != 2:
             raise ValueError("Country code must be a 2 character string")
 
+    def __reduce__(self):
+        # Unpickled (and copied) countries are the same instances too
+        return type(self), (self.code,)
+
     def __str__(self):
         return f"Country({self.name}, {self.code}), PopularLanguage({self.lang_name}, {self.lang_code})"
 
 
+class TranslationCache:
+    """
+    A cache of translated strings, keyed by the source language, the
+    destination language and the text. The translations are kept in memory,
+    and if a `path` to a JSON file is given, also saved there - so repeated
+    runs of the bot translate each string only once, and don't need the
+    network at all. Translations older than `ttl` seconds are translated
+    again (`None` = they never expire).
+
+    Safe to use from multiple threads. Processes that share the file merge
+    their translations with it on each save, but without locking the file -
+    so the merge is best-effort: when two processes save at the same time,
+    the translations of one of them may be lost (and translated again later).
+    A corrupted file is treated as an empty cache.
+
+    Set as the cache of all of the string managers with
+    `StringManager.set_translation_cache`.
+    """
+
+    # Part of the file - must be changed whenever the format of the file
+    # changes, so old files are not loaded anymore
+    FILE_VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        assert ttl is None or ttl >= 0, "The TTL can't be negative"
+
+        self.__path = path
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+
+        # (src, dest, text) -> (translation, time it was translated)
+        self.__translations = None  # Loaded when it is first needed
+
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def path(self,) -> Optional[str]:
+        return self.__path
+
+    @property
+    def ttl(self,) -> Optional[float]:
+        return self.__ttl
+
+    @property
+    def hits(self,) -> int:
+        return self.__hits
+
+    @property
+    def misses(self,) -> int:
+        return self.__misses
+
+    def __len__(self,) -> int:
+        with self.__lock:
+            return len(self.__get_translations())
+
+    def get(self, src: str, dest: str, text: str) -> Optional[str]:
+        """ Returns the saved translation of the given text (`None` if there
+        is no such translation, or if it expired). """
+
+        with self.__lock:
+            translation = self.__get_translations().get((src, dest, text))
+
+            if translation is None or self.__expired(translation[1]):
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            return translation[0]
+
+    def put(self, src: str, dest: str, text: str, translation: str) -> None:
+        """ Saves the given translation of the given text. """
+        self.put_many(src, dest, {text: translation})
+
+    def put_many(self, src: str, dest: str, translations: dict) -> None:
+        """ Saves the given translations (that map texts to their
+        translations), and writes the file only once. """
+
+        with self.__lock:
+            now = time.time()
+            cached = self.__get_translations()
+            for text, translation in translations.items():
+                cached[(src, dest, text)] = (translation, now)
+
+            if self.path is not None:
+                self.__store()
+
+    def clear(self,) -> None:
+        """ Removes the translations from the memory (not from the disk). """
+
+        with self.__lock:
+            self.__translations = dict()
+
+    def __expired(self, translated_at: float) -> bool:
+        return self.ttl is not None and time.time() - translated_at > self.ttl
+
+    def __get_translations(self,) -> dict:
+        if self.__translations is None:
+            self.__translations = self.__load()
+
+        return self.__translations
+
+    def __load(self,) -> dict:
+        if self.path is None:
+            return dict()
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return dict()
+        except ValueError:  # Including `json.JSONDecodeError`
+            logger.warning("The translation cache %s is corrupted - ignored", self.path)
+            return dict()
+
+        try:
+            if content.get("version") != self.FILE_VERSION:
+                return dict()
+
+            return {
+                (src, dest, text): (translation, translated_at)
+                for src, dest, text, translation, translated_at in content["translations"]
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            logger.warning("The translation cache %s is corrupted - ignored", self.path)
+            return dict()
+
+    def __store(self,) -> None:
+        # Other processes may have saved translations since the file was
+        # loaded, so they are merged with the translations in the memory
+        translations = {**self.__load(), **self.__translations}
+        self.__translations = translations
+
+        content = {
+            "version": self.FILE_VERSION,
+            "translations": [
+                [*key, translation, translated_at]
+                for key, (translation, translated_at) in translations.items()
+            ],
+        }
+
+        # Written into a temporary file first, so other processes never read
+        # a half written file
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(suffix=".json", dir=folder)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class NumberFormatter:
+    """
+    Formats numbers like the given language does - with its symbols for
+    separating the thousands and the floating point (`.` or `,`), and its
+    grouping of the digits. The symbols and the grouping are read from the
+    locale data of babel only once, when the formatter is created, so
+    formatting doesn't depend on the locales that are installed on the
+    machine, and doesn't change the global locale of the process - it's
+    safe to use from multiple threads.
+
+    Formats like the `n` format of Python, with the locale of the language.
+    """
+
+    __NUMBER_PATTERN = re.compile(r"(-?)(\d+)(.*)")
+
+    def __init__(self, lang_code: str):
+        locale = get_locale(lang_code)
+
+        symbols = locale.number_symbols
+        if "latn" in symbols:
+            # Newer versions of babel keep the symbols of each numbering system
+            symbols = symbols["latn"]
+
+        self.__group_symbol = symbols["group"]
+        self.__decimal_symbol = symbols["decimal"]
+        self.__primary_grouping, self.__secondary_grouping = \
+            locale.decimal_formats[None].grouping
+
+    def format(self,
+               number: Union[int, float],
+               leading_zeros: int = None,
+               floating_max: int = None,
+               ) -> str:
+        """ Returns the number as a string, with at least `leading_zeros`
+        digits. Floats are rounded to `floating_max` digits after the point
+        (if given), without separating the thousands. """
+
+        width = f"0{leading_zeros}" if leading_zeros else ""
+
+        if floating_max and isinstance(number, float):
+            return f"{number:{width}.{floating_max}f}"
+
+        string = f"{number:{width}{'g' if isinstance(number, float) else 'd'}}"
+
+        match = self.__NUMBER_PATTERN.fullmatch(string)
+        if match is None:
+            return string  # Like `nan` and `inf`
+
+        sign, digits, rest = match.groups()
+        return sign + self.__group(digits) + rest.replace(".", self.__decimal_symbol)
+
+    def __group(self, digits: str) -> str:
+        if len(digits) <= self.__primary_grouping:
+            return digits
+
+        groups = [digits[-self.__primary_grouping:]]
+        digits = digits[:-self.__primary_grouping]
+
+        while digits:
+            groups.append(digits[-self.__secondary_grouping:])
+            digits = digits[:-self.__secondary_grouping]
+
+        return self.__group_symbol.join(reversed(groups))
+
+
+class TranslationCatalog:
+    """
+    The translations of the strings into one language, compiled in advance:
+    the keys are normalized, and each template is split into its text and
+    its placeholders (like `{days}`) - so filling a template is a single
+    join. Catalogs of the folders in `lang_config` (like `lang_config/he`)
+    are loaded with the `get` method, which compiles each of them only once
+    and shares it between all of the string managers.
+    """
+
+    LANG_CONFIG_FOLDER = "lang_config"
+
+    # Compiled catalogs of the language folders (`None` = no such folder),
+    # keyed by the language code. See the `get` method for more information!
+    __catalogs = dict()
+
+    __PLACEHOLDER_PATTERN = re.compile(r"{(\w+)}")
+
+    def __init__(self, translations: dict):
+        self.__strings = {
+            self.normalize_key(key): string
+            for key, string in translations.items()
+        }
+        self.__templates = {
+            key: self.compile_template(string)
+            for key, string in self.__strings.items()
+        }
+
+    @classmethod
+    def from_folder(cls, path: str) -> 'TranslationCatalog':
+        """ Compiles the translations in all of the JSON files in the given
+        folder (files are read by the order of their names). """
+
+        translations = dict()
+        for file_path in sorted(glob.glob(os.path.join(path, "*.json"))):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                translations.update(json.load(f))
+
+        return cls(translations)
+
+    @classmethod
+    def get(cls, lang_code: str) -> Optional['TranslationCatalog']:
+        """ Returns the catalog of the given language (like `he_IL` - or `he`,
+        if there is no folder for `he_IL`), or `None` if there is no folder
+        for the language in `LANG_CONFIG_FOLDER`. """
+
+        if lang_code not in cls.__catalogs:
+            catalog = None
+
+            for folder in dict.fromkeys([lang_code, lang_code.split("_")[0].lower()]):
+                path = os.path.join(cls.LANG_CONFIG_FOLDER, folder)
+                if os.path.isdir(path):
+                    catalog = cls.from_folder(path)
+                    break
+
+            cls.__catalogs[lang_code] = catalog
+
+        return cls.__catalogs[lang_code]
+
+    @classmethod
+    def compile_all(cls,) -> dict:
+        """ Compiles the catalogs of all of the language folders, and returns
+        them keyed by the name of the folder. """
+
+        return {
+            folder: cls.get(folder)
+            for folder in sorted(os.listdir(cls.LANG_CONFIG_FOLDER))
+            if os.path.isdir(os.path.join(cls.LANG_CONFIG_FOLDER, folder))
+        }
+
+    @staticmethod
+    def normalize_key(key: str) -> str:
+        return key.strip().lower()
+
+    @classmethod
+    def compile_template(cls, template: str) -> Tuple[str, ...]:
+        """ Splits the template into its text and the names of its
+        placeholders, alternately - starting and ending with text. """
+        return tuple(cls.__PLACEHOLDER_PATTERN.split(template))
+
+    @staticmethod
+    def placeholders(template: Tuple[str, ...]) -> Tuple[str, ...]:
+        """ Returns the names of the placeholders of the compiled template. """
+        return template[1::2]
+
+    @staticmethod
+    def fill_template(template: Tuple[str, ...], values: dict) -> str:
+        """ Returns the compiled template, with its placeholders replaced by
+        the given values. Placeholders without a value are kept as is. """
+
+        if len(template) == 1:
+            return template[0]
+
+        parts = list(template)
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            parts[index] = str(values[name]) if name in values else f"{{{name}}}"
+
+        return "".join(parts)
+
+    def __contains__(self, key: str) -> bool:
+        return self.normalize_key(key) in self.__strings
+
+    def __len__(self,) -> int:
+        return len(self.__strings)
+
+    @property
+    def strings(self,) -> dict:
+        """ The translated strings, keyed by their normalized keys. """
+        return dict(self.__strings)
+
+    def string(self, key: str) -> Optional[str]:
+        return self.__strings.get(self.normalize_key(key))
+
+    def template(self, key: str) -> Optional[Tuple[str, ...]]:
+        return self.__templates.get(self.normalize_key(key))
+
+    def missing_keys(self, keys: Iterable[str]) -> List[str]:
+        """ Returns the keys that have no translation in the catalog. """
+        return [key for key in keys if key not in self]
+
+
 class StringManager:
 
     __BASE_LANG_CODE = "en_US"
 
+    # The cache of the translated strings (`None` = no cache).
+    # See the `set_translation_cache` method for more information!
+    __translation_cache = None
+
+    # The strings of the properties (in the base language), keyed by the key
+    # of their translation. Templates are translated with their placeholders
+    # (like `{days}`), which are replaced only after the translation.
+    BASE_STRINGS = {
+        "unchanged": "Unchanged",
+        "unavailable": "Unavailable",
+        "deaths": "Deaths",
+        "recovered": "Recovered",
+        "active_cases": "Active Cases",
+        "new_cases": "New Cases",
+        "basic_reproduction": "Basic Reproduction (R)",
+        "r_graph_title": "Basic reproduction (R) in the last {days} days",
+        "new_cases_graph_title": "New cases a day in the last {days} days",
+        "third_party": "The information is unofficial and provided by a third party",
+        "caption": "COVID-19 status in {country} - {date} 🦠😷🏥",
+    }
+
+    __BASE_CATALOG = TranslationCatalog(BASE_STRINGS)
+
+    # The most strings that are sent to the translator in a single request
+    TRANSLATE_BATCH_SIZE = 32
+
     def __init__(self,):
         self.translator_delete()
 
@@ -79,52 +494,124 @@ class StringManager:
         """ Recives a number as a float or an integer, and returns it as a string.
         This takes into consideration that some languages use `.` to separate 
         thousends, and other languages use `,` - The same thing goes with the
-        floating point (`.` or `,`).
+        floating point (`.` or `,`). See `NumberFormatter`.
         """
 
-        string = "{number:n}"
-
-        if leading_zeros:
-            string = string.replace(':', f':0{leading_zeros}')
-
-        if floating_max and isinstance(number, float):
-            string = string.replace('n}', f'.{floating_max}f}}')
-
-        lang = self.__dest_lang
-        if lang is None:
-            lang = self.__BASE_LANG_CODE
+        if self.__number_formatter is None:
+            lang = self.__dest_lang
+            if lang is None:
+                lang = self.__BASE_LANG_CODE
 
-        locale.setlocale(locale.LC_ALL, locale=lang)
-        string = string.format(number=number)
-        locale.setlocale(locale.LC_ALL, '')  # Reset back to default
+            self.__number_formatter = NumberFormatter(lang)
 
-        return string
+        return self.__number_formatter.format(
+            number, leading_zeros=leading_zeros, floating_max=floating_max)
 
     def config_translator(self,
                           dest_lang: str,
                           translations: dict = None,
+                          translator=None,
+                          prefetch: bool = True,
                           ) -> None:
+        """ Configures the language of the strings. `translations` maps the
+        keys of the strings to their translations, on top of the catalog of
+        the language (see `TranslationCatalog.get`). The rest of the strings
+        are reported right away (see `missing_translations`), and translated
+        with the given `translator` - any object with the interface of
+        `googletrans.Translator`, which is used by default.
+
+        If `prefetch` is set, all of the missing strings are translated
+        right away, in batches (see the `prefetch_translations` method).
+        Reading the properties never waits for the translator: strings that
+        were not translated are in the base language.
+        """
+
         self.__check_valid_lang_code(dest_lang)
-        self.__translator = Translator()
+        self.__translator = translator  # `None` = created when first needed
         self.__dest_lang = dest_lang
+        self.__templates = dict()
+        self.__number_formatter = None  # Created when it is first needed
 
         if translations is None:
             translations = dict()
 
-        self.__translations = translations
+        self.__translations = TranslationCatalog(translations)
+        self.__catalog = TranslationCatalog.get(dest_lang)
+
+        missing = self.missing_translations
+        if missing and dest_lang.lower() != self.__BASE_LANG_CODE.lower():
+            logger.warning("No translations to %s for %s - translated by the translator",
+                           dest_lang, missing)
+
+        if prefetch:
+            try:
+                self.prefetch_translations()
+            except Exception:
+                # The missing strings are in the base language
+                logger.exception("Failed to prefetch the translations to %s",
+                                 dest_lang)
 
     def config_country_translator(self,
                                   country: Union[Country, str],
                                   translations: dict = None,
+                                  translator=None,
+                                  prefetch: bool = True,
                                   ) -> None:
         if not isinstance(country, Country):
             country = Country(country)
 
         self.config_translator(
             f'{country.lang_code.lower()}_{country.code.upper()}',
-            translations=translations
+            translations=translations,
+            translator=translator,
+            prefetch=prefetch,
         )
 
+    def prefetch_translations(self,) -> None:
+        """ Translates all of the strings of the properties (see
+        `BASE_STRINGS`) that are not in the translations of the manager, in
+        as few requests to the translator as possible. Templates are
+        translated once, with their placeholders. """
+
+        keys = [
+            key for key in self.missing_translations
+            if key not in self.__templates
+        ]
+
+        translations = self.translate_many([self.BASE_STRINGS[key] for key in keys])
+        if translations is None:
+            return
+
+        placeholders = TranslationCatalog.placeholders
+        for key, translation in zip(keys, translations):
+            template = TranslationCatalog.compile_template(translation)
+
+            if not set(placeholders(self.__BASE_CATALOG.template(key))) <= \
+                    set(placeholders(template)):
+                logger.warning("The translation of %s to %s lost its placeholders "
+                               "- using the base string", key, self.__dest_lang)
+                continue
+
+            self.__templates[key] = template
+
+    @property
+    def missing_translations(self,) -> List[str]:
+        """ The keys of the strings (see `BASE_STRINGS`) that are neither in
+        the translations of the manager nor in the catalog of its language,
+        so they are translated by the translator. """
+
+        return [key for key in self.BASE_STRINGS if self.__find_template(key) is None]
+
+    @classmethod
+    def set_translation_cache(cls, cache: Optional[TranslationCache]) -> None:
+        """ Sets the cache of the translated strings of all of the string
+        managers (`None` = don't cache). See the `translate` method. """
+        StringManager.__translation_cache = cache
+
+    @classmethod
+    def get_translation_cache(cls,) -> Optional[TranslationCache]:
+        return StringManager.__translation_cache
+
     @staticmethod
     def __check_valid_lang_code(code: str):
         if not isinstance(code, str):
@@ -140,111 +627,163 @@ class StringManager:
         """ Delete the configuration of the translator. """
         self.__translator = None
         self.__dest_lang = None
-        self.__translations = dict()
+        self.__translations = TranslationCatalog(dict())
+        self.__catalog = None
+        self.__templates = dict()  # The translated `BASE_STRINGS`
+        self.__number_formatter = None
+
+    @property
+    def fingerprint(self,) -> tuple:
+        """ Identifies the configuration of the string manager. Managers with
+        the same fingerprint generate the same strings. """
+        return (self.__dest_lang, tuple(sorted(self.__translations.strings.items())))
 
     def from_translations(self, key: str):
-        key = key.lower()
+        string = self.__translations.string(key)
+        if string is None and self.__catalog is not None:
+            string = self.__catalog.string(key)
 
-        if key in self.__translations:
-            return self.__translations[key]
+        return string
+
+    def __find_template(self, key: str) -> Optional[Tuple[str, ...]]:
+        """ Returns the compiled template of the given key, from the
+        translations of the manager or from the catalog of its language. """
+
+        template = self.__translations.template(key)
+        if template is None and self.__catalog is not None:
+            template = self.__catalog.template(key)
+
+        return template
 
     def translate(self, string: str,) -> str:
+        """ Returns the string translated into the configured language (`None`
+        if no language is configured). See the `translate_many` method. """
+
+        translations = self.translate_many([string])
+        if translations is None:
+            return None
 
-        if self.__translator is None:
+        return translations[0]
+
+    def translate_many(self, strings: List[str]) -> Optional[List[str]]:
+        """ Returns the given strings translated into the configured language
+        (`None` if no language is configured). If a translation cache is set
+        (see `set_translation_cache`), it is checked before the translator,
+        so strings that were already translated don't need the network. The
+        rest are sent to the translator in batches of `TRANSLATE_BATCH_SIZE`.
+        """
+
+        if self.__dest_lang is None:
             return None
 
         if self.__dest_lang.lower() == self.__BASE_LANG_CODE.lower():
-            return string
+            return list(strings)
+
+        src = self.__BASE_LANG_CODE
+        dest = self.__dest_lang
+        cache = self.get_translation_cache()
+
+        translations = dict()
+        if cache is not None:
+            for string in strings:
+                translation = cache.get(src, dest, string)
+                if translation is not None:
+                    translations[string] = translation
+
+        missing = list(dict.fromkeys(
+            string for string in strings if string not in translations))
+
+        if missing and self.__translator is None:
+            # Imported only when a string is really translated, because
+            # googletrans (and its HTTP client) is slow to import
+            from googletrans import Translator
+            self.__translator = Translator()
+
+        translated = dict()
+        try:
+            for index in range(0, len(missing), self.TRANSLATE_BATCH_SIZE):
+                batch = missing[index:index + self.TRANSLATE_BATCH_SIZE]
+                results = self.__translator.translate(batch, dest=dest, src=src)
 
-        return self.__translator.translate(
-            string,
-            dest=self.__dest_lang,
-            src=self.__BASE_LANG_CODE,
-        ).text
+                for string, result in zip(batch, results):
+                    translated[string] = result.text
+        finally:
+            # Saved once for all of the batches (even if one of them failed)
+            if cache is not None and translated:
+                cache.put_many(src, dest, translated)
+
+        translations.update(translated)
+
+        return [translations[string] for string in strings]
 
     def __get_property(self,
                        key: str,
-                       base_str: str,
                        **replacing_dict,
                        ):
 
-        file_translation = self.from_translations(key)
-        if file_translation is not None:
-            return self.__replace(file_translation, **replacing_dict)
-
-        base_str = self.__replace(base_str, **replacing_dict)
-        translation = self.translate(base_str)
-        if translation is not None:
-            return translation
-
-        return base_str
+        """ Returns the string of the given key, filled with the given
+        values. The translator is never used here: strings that are in no
+        translation (see `missing_translations`) and were not prefetched (see
+        `prefetch_translations`) are returned in the base language. """
 
-    def __replace(self, string: str, **replacing_dict):
+        template = self.__find_template(key)
+        if template is None:
+            template = self.__templates.get(key)
+        if template is None:
+            template = self.__BASE_CATALOG.template(key)
 
-        if not replacing_dict:
-            return string
+        return self.__fill(template, replacing_dict)
 
-        if "{date}" in string:
-            replaced_date = self.__replace_date(string)
-            return self.__replace(replaced_date, **replacing_dict)
+    def __fill(self, template: Tuple[str, ...], values: dict) -> str:
+        if "date" in TranslationCatalog.placeholders(template) and "date" not in values:
+            values = {**values, "date": self.__date_string()}
 
-        key = list(replacing_dict.keys())[0]
-        string = string.replace(f"{{{key}}}", str(replacing_dict[key]))
-        del replacing_dict[key]
+        return TranslationCatalog.fill_template(template, values)
 
-        return self.__replace(string, **replacing_dict)
-
-    def __replace_date(self, string: str, format="full"):
+    def __date_string(self, format="full") -> str:
         date = datetime.date.today()
-        date_str = babel.dates.format_date(
-            date, format=format, locale=self.__dest_lang)
-
-        return string.replace("{date}", date_str)
+        locale = None if self.__dest_lang is None else get_locale(self.__dest_lang)
+        return babel.dates.format_date(date, format=format, locale=locale)
 
     @property
     def unchanged(self,) -> str:
-        return self.__get_property("unchanged", "Unchanged")
+        return self.__get_property("unchanged")
 
     @property
     def unavailable(self,) -> str:
-        return self.__get_property("unavailable", "Unavailable")
+        return self.__get_property("unavailable")
 
     @property
     def deaths(self,) -> str:
-        return self.__get_property("deaths", "Deaths")
+        return self.__get_property("deaths")
 
     @property
     def recovered(self,) -> str:
-        return self.__get_property("recovered", "Recovered")
+        return self.__get_property("recovered")
 
     @property
     def active_cases(self,) -> str:
-        return self.__get_property("active_cases", "Active Cases")
+        return self.__get_property("active_cases")
 
     @property
     def new_cases(self,) -> str:
-        return self.__get_property("new_cases", "New Cases")
+        return self.__get_property("new_cases")
 
     @property
     def basic_reproduction(self,) -> str:
-        return self.__get_property("basic_reproduction", "Basic Reproduction (R)")
+        return self.__get_property("basic_reproduction")
 
     def r_graph_title(self, days: int):
-        return self.__get_property("r_graph_title",
-                                   "Basic reproduction (R) in the last {days} days",
-                                   days=days)
+        return self.__get_property("r_graph_title", days=days)
 
     def new_cases_graph_title(self, days: int):
-        return self.__get_property("new_cases_graph_title",
-                                   "New cases a day in the last {days} days",
-                                   days=days)
+        return self.__get_property("new_cases_graph_title", days=days)
 
     def subtitle(self, username: str = None):
 
         lines = [
-            self.__replace_date("{date}"),
-            self.__get_property(
-                "third_party", "The information is unofficial and provided by a third party"),
+            self.__date_string(),
+            self.__get_property("third_party"),
         ]
 
         if username is not None:
@@ -253,11 +792,7 @@ class StringManager:
         return (" " * 8).join(lines)
 
     def caption(self, country):
-        return self.__get_property(
-            "caption",
-            "COVID-19 status in {country} - {date} 🦠😷🏥",
-            country=country,
-        )
+        return self.__get_property("caption", country=country)
 
 
 class StringManagerDependent(ABC):